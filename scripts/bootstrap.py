@@ -0,0 +1,59 @@
+"""Einmalige Einrichtung der Projekt-Abhaengigkeiten.
+
+Der pip-Aufruf ist bewusst aus src/main.py herausgezogen: er kostet auch
+im Gutfall Sekunden und gehoert nicht in den Startpfad der GUI. Dieses
+Skript wird von start.bat bzw. manuell aufgerufen.
+"""
+
+from __future__ import annotations
+
+import subprocess
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+
+
+def _pip_install(arguments: list[str]) -> int:
+    """Fuehrt pip moeglichst im eigenen Prozess aus.
+
+    Der In-Prozess-Aufruf spart den Start eines zweiten Interpreters samt
+    erneutem Import der pip-Maschinerie. pip._internal ist keine stabile
+    API, daher bleibt der Subprozess als Rueckfallebene bestehen.
+    """
+    try:
+        from pip._internal.cli.main import main as pip_main
+    except ImportError:
+        pip_main = None
+    if pip_main is not None:
+        try:
+            return int(pip_main(arguments) or 0)
+        except SystemExit as exc:  # pip beendet sich teils per sys.exit.
+            code = exc.code
+            return code if isinstance(code, int) else 1
+        except Exception:  # noqa: BLE001 - interne pip-API, defensiv abfangen.
+            print("In-Prozess-pip fehlgeschlagen, weiche auf Subprozess aus.")
+    completed = subprocess.run([sys.executable, "-m", "pip", *arguments], check=False)
+    return completed.returncode
+
+
+def main() -> int:
+    """Installiert alle Pakete aus requirements.txt in die aktive Umgebung."""
+    requirements_path = PROJECT_ROOT / "requirements.txt"
+    if not requirements_path.exists():
+        print(f"requirements.txt nicht gefunden unter {requirements_path}.")
+        return 1
+    print("Installiere Projekt-Abhaengigkeiten...")
+    returncode = _pip_install(["install", "-r", str(requirements_path)])
+    if returncode != 0:
+        print(
+            "Installation der Abhaengigkeiten ist fehlgeschlagen. Bitte pruefe die Ausgabe "
+            "und fuehre 'pip install -r requirements.txt' manuell aus."
+        )
+        return returncode or 1
+    print("Abhaengigkeiten sind installiert.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
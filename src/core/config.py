@@ -2,12 +2,46 @@
 
 from __future__ import annotations
 
+import copy
+import functools
 from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Any
 
 import yaml
 
+try:
+    # libyaml-C-Backend ist rund 10x schneller als der reine Python-Loader.
+    from yaml import CSafeDumper as SafeDumper, CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeDumper, SafeLoader
+
+# Laufzeitwerte, die niemals in die YAML-Datei geschrieben werden.
+_RUNTIME_KEYS = frozenset({"config_path", "queue"})
+
+
+@functools.lru_cache(maxsize=8)
+def _load_yaml(path_str: str, mtime_ns: int, size: int) -> dict[str, Any]:
+    """Parst die YAML-Datei einmal pro (Pfad, mtime, Groesse)-Kombination."""
+    with open(path_str, "r", encoding="utf-8") as config_file:
+        return yaml.load(config_file, Loader=SafeLoader) or {}
+
+
+@dataclass(frozen=True, slots=True)
+class SettingsSnapshot:
+    """Unveraenderlicher Auszug der haeufig gelesenen Pfad-Werte.
+
+    Konsumenten wie Watcher und Pipeline lesen per Attribut statt ueber
+    zwei dict-Lookups samt Default-Allokation; slots=True legt die Felder
+    kompakt ohne Instanz-Dict ab. Der Auszug wird bei reload/save neu
+    gebaut, analog zum Pfad-Cache in _refresh_path_cache.
+    """
+
+    input_dir: str
+    output_dir: str
+    backup_dir: str
+    models_dir: Path
+
 
 @dataclass
 class Config:
@@ -24,27 +58,45 @@ class Config:
     def reload(self) -> None:
         """Laedt die Konfiguration neu aus der YAML-Datei."""
         if self.config_path.exists():
-            with self.config_path.open("r", encoding="utf-8") as config_file:
-                self.data = yaml.safe_load(config_file) or {}
+            # Cache-Schluessel ueber mtime/Groesse, damit Aenderungen sofort greifen.
+            stat = self.config_path.stat()
+            cached = _load_yaml(str(self.config_path), stat.st_mtime_ns, stat.st_size)
+            self.data = copy.deepcopy(cached)
         else:
             self.data = {}
         self.data["config_path"] = str(self.config_path)
+        self._refresh_path_cache()
+
+    def _refresh_path_cache(self) -> None:
+        """Loest die Pfade einmalig auf, statt resolve() pro Zugriff zu zahlen."""
+        paths = self.data.get("paths", {})
+        self._model_path = Path(paths.get("models", "./models")).resolve()
+        self._snapshot = SettingsSnapshot(
+            input_dir=paths.get("input", "./input"),
+            output_dir=paths.get("output", "./output"),
+            backup_dir=paths.get("backup", "./backup"),
+            models_dir=self._model_path,
+        )
+
+    def snapshot(self) -> SettingsSnapshot:
+        """Gibt den aktuellen, unveraenderlichen Pfad-Auszug zurueck."""
+        return self._snapshot
 
     def save(self, new_data: dict[str, Any]) -> None:
         """Schreibt eine aktualisierte Konfiguration in die YAML-Datei."""
         self.data.update(new_data)
+        if "paths" in new_data:
+            self._refresh_path_cache()
         self._write_to_disk()
 
     def _write_to_disk(self) -> None:
         """Persistiert die Konfiguration ohne Laufzeitdaten."""
-        payload = {
-            key: value
-            for key, value in self.data.items()
-            if key not in {"config_path", "queue"}
-        }
+        payload = self.data.copy()
+        for runtime_key in _RUNTIME_KEYS:
+            payload.pop(runtime_key, None)
         self.config_path.parent.mkdir(parents=True, exist_ok=True)
         with self.config_path.open("w", encoding="utf-8") as config_file:
-            yaml.safe_dump(payload, config_file, sort_keys=False, allow_unicode=True)
+            yaml.dump(payload, config_file, Dumper=SafeDumper, sort_keys=False, allow_unicode=True)
 
     def get(self, key: str, default: Any | None = None) -> Any:
         """Gibt einen Wert aus der Konfiguration zurueck."""
@@ -53,11 +105,12 @@ class Config:
     def set_runtime_value(self, key: str, value: Any) -> None:
         """Setzt Werte, die nicht in die YAML geschrieben werden sollen."""
         self.data[key] = value
+        if key == "paths":
+            self._refresh_path_cache()
 
     def get_model_path(self) -> Path:
-        """Gibt den Pfad fuer Modelldownloads zurueck."""
-        paths = self.data.get("paths", {})
-        return Path(paths.get("models", "./models")).resolve()
+        """Gibt den vorab aufgeloesten Pfad fuer Modelldownloads zurueck."""
+        return self._model_path
 
     def __getitem__(self, key: str) -> Any:
         """Erlaubt dict-aehnlichen Zugriff auf die Daten."""
@@ -36,7 +36,8 @@ class ContextManager:
         context_path = Path(folder_path) / self.filename
         context_path.parent.mkdir(parents=True, exist_ok=True)
         try:
-            context_path.write_text(content, encoding="utf-8")
+            # Einmal in C encodieren und als ein write() schreiben statt ueber TextIOWrapper.
+            context_path.write_bytes(content.encode("utf-8"))
         except OSError as exc:
             logger.error("Kontext konnte nicht geschrieben werden (%s): %s", exc, context_path)
             return
@@ -2,15 +2,21 @@
 
 from __future__ import annotations
 
+import errno
 import hashlib
 import logging
+import mmap
+import os
 import shutil
-from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 from datetime import date
 from pathlib import Path
 import queue
 import threading
-from typing import Callable
+import time
+from functools import lru_cache
+from typing import Callable, Optional
 
 import torch
 
@@ -22,6 +28,33 @@ from src.core.model_manager import ModelManager
 
 logger = logging.getLogger(__name__)
 
+# Sentinel, mit dem stop() die blockierende Queue-Schleife aufweckt.
+_STOP = object()
+
+# Tagesdatum wird maximal einmal pro Minute neu bestimmt.
+_TODAY_CACHE: tuple[float, str] = (0.0, "")
+
+
+@lru_cache(maxsize=1024)
+def _ensure_dir(path_str: str) -> None:
+    """Legt einen Ordner an; pro Pfad nur einmal je Prozesslaufzeit."""
+    Path(path_str).mkdir(parents=True, exist_ok=True)
+
+
+def _noop(_payload) -> None:
+    """Leerer Callback-Ersatz, wenn keine GUI angebunden ist."""
+
+
+def _today_iso() -> str:
+    """Liefert das heutige ISO-Datum mit 60-Sekunden-Cache."""
+    global _TODAY_CACHE
+    stamp, value = _TODAY_CACHE
+    now = time.monotonic()
+    if not value or now - stamp >= 60.0:
+        value = date.today().isoformat()
+        _TODAY_CACHE = (now, value)
+    return value
+
 
 class FileOperations:
     """Platzhalter fuer Dateibewegungen innerhalb der Pipeline."""
@@ -29,10 +62,18 @@ class FileOperations:
     @staticmethod
     def move(source_path: Path, target_folder: Path, target_name: str | None = None) -> Path:
         """Verschiebt eine Datei in den Zielordner."""
-        target_folder.mkdir(parents=True, exist_ok=True)
+        _ensure_dir(str(target_folder))
         target_filename = target_name or source_path.name
         target_path = target_folder / target_filename
-        return Path(shutil.move(str(source_path), str(target_path)))
+        try:
+            # Auf demselben Dateisystem genuegt ein atomarer replace-Syscall.
+            os.replace(source_path, target_path)
+            return target_path
+        except OSError as exc:
+            if exc.errno != errno.EXDEV:
+                raise
+            # Geraetegrenze: shutil.move kopiert und loescht.
+            return Path(shutil.move(str(source_path), str(target_path)))
 
 
 class ProcessingPipeline:
@@ -49,54 +90,118 @@ class ProcessingPipeline:
             output_root=Path(paths.get("output", "./output")),
         )
         self._callbacks: dict[str, Callable] = {}
+        # Direkt gebundene Handler: ein Attribut-Load statt dict-Lookup pro Emit.
+        self._log_handler: Callable = _noop
+        self._emit_file_processed: Callable = _noop
+        # Log-Zeilen werden gesammelt und mit max. 20 Hz an die GUI gereicht,
+        # statt pro Zeile einen Cross-Thread-Signal-Hop zu bezahlen.
+        self._pending_logs: list[str] = []
+        self._log_lock = threading.Lock()
+        self._log_timer: threading.Timer | None = None
+        self._inflight = threading.BoundedSemaphore(4)
         self._stop_event = threading.Event()
+        # Nur waehrend run() True; stop() legt das Sentinel ausschliesslich
+        # dann ein, damit keine veralteten Sentinels in der Queue stranden.
+        self._running = False
+
+    _LOG_FLUSH_INTERVAL = 0.05
 
     def set_callbacks(self, callbacks: dict[str, Callable]) -> None:
         """Setzt die Callback-Funktionen fuer GUI-Updates."""
         self._callbacks = callbacks
+        self._log_handler = callbacks.get("log") or _noop
+        self._emit_file_processed = callbacks.get("file_processed") or _noop
 
-    def _emit(self, key: str, payload) -> None:
-        """Sendet ein Ereignis an die GUI, falls vorhanden."""
-        callback = self._callbacks.get(key)
-        if callback:
-            callback(payload)
+    def _emit_log(self, message: str) -> None:
+        """Sammelt eine Log-Zeile; der Flush-Timer reicht sie gebuendelt weiter."""
+        if self._log_handler is _noop:
+            return
+        with self._log_lock:
+            self._pending_logs.append(message)
+            if self._log_timer is None:
+                self._log_timer = threading.Timer(self._LOG_FLUSH_INTERVAL, self._flush_logs)
+                self._log_timer.daemon = True
+                self._log_timer.start()
+
+    def _flush_logs(self) -> None:
+        """Reicht alle gesammelten Log-Zeilen als einen Batch an die GUI."""
+        with self._log_lock:
+            if self._log_timer is not None:
+                self._log_timer.cancel()
+                self._log_timer = None
+            batch = self._pending_logs
+            self._pending_logs = []
+        if batch:
+            self._log_handler("\n".join(batch))
 
     def run(self) -> None:
         """Verarbeitet Dateien aus der Queue, bis ein Stop-Signal kommt."""
         if self.queue is None:
             logger.error("Keine Queue in den Settings gefunden.")
-            self._emit("log", "Keine Queue in den Settings gefunden.")
+            self._emit_log("Keine Queue in den Settings gefunden.")
             return
 
         self._stop_event.clear()
-        self._emit("log", "Processing-Pipeline gestartet.")
-
-        while not self._stop_event.is_set():
-            try:
-                file_path = self.queue.get(timeout=0.5)
-            except queue.Empty:
-                continue
-
+        self._emit_log("Processing-Pipeline gestartet.")
+
+        # Standard: ein Worker. process() wechselt pro Datei zwischen OCR-
+        # und LLM-Modell; parallele Dateien wuerfen sich die Modelle
+        # gegenseitig aus dem VRAM (Reload-Ping-Pong, auf Consumer-GPUs
+        # droht OOM). Der Lock im ModelManager schuetzt nur das Laden,
+        # nicht die laufende Inferenz. Mehr Worker nur setzen, wenn beide
+        # Modelle gleichzeitig in den VRAM passen.
+        max_workers = int(self.settings.get("pipeline_workers", 1) or 1)
+        # Backpressure: maximal 2x Worker Dateien gleichzeitig in Arbeit,
+        # damit Massen-Drops nicht unbegrenzt im Executor aufgestaut werden.
+        self._inflight = threading.BoundedSemaphore(max_workers * 2)
+        self._running = True
+        try:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                # Einziger Ausstieg ist das Sentinel: eine zusaetzliche
+                # Event-Pruefung koennte die Schleife beenden, ohne das
+                # Sentinel zu konsumieren, das dann den naechsten Start
+                # sofort wieder abwuergen wuerde.
+                while True:
+                    # Blockierend warten statt alle 0,5 s aufzuwachen; stop() legt das Sentinel ein.
+                    file_path = self.queue.get()
+                    if file_path is _STOP:
+                        self.queue.task_done()
+                        break
+                    self._inflight.acquire()
+                    executor.submit(self._process_item, file_path)
+        finally:
+            self._running = False
+
+        self._emit_log("Processing-Pipeline gestoppt.")
+        # Letzte Zeilen sofort anzeigen statt auf den Timer zu warten.
+        self._flush_logs()
+
+    def _process_item(self, file_path) -> None:
+        """Verarbeitet eine einzelne Datei inklusive Fehlerbehandlung."""
+        try:
+            self._emit_log(f"Verarbeite Datei: {file_path}")
+            target_path = self.document_pipeline.process(file_path)
+            self._emit_log(f"Datei verarbeitet: {target_path}")
+            self._emit_file_processed(str(target_path))
+        except Exception as exc:
+            logger.exception("Fehler bei der Dateiverarbeitung: %s", exc)
+            self._emit_log(f"Fehler bei der Verarbeitung: {exc}")
+        finally:
+            self._inflight.release()
             try:
-                self._emit("log", f"Verarbeite Datei: {file_path}")
-                target_path = self.document_pipeline.process(file_path)
-                self._emit("log", f"Datei verarbeitet: {target_path}")
-                self._emit("file_processed", str(target_path))
-            except Exception as exc:
-                logger.exception("Fehler bei der Dateiverarbeitung: %s", exc)
-                self._emit("log", f"Fehler bei der Verarbeitung: {exc}")
-            finally:
-                try:
-                    self.queue.task_done()
-                except ValueError:
-                    # Falls task_done ohne passenden Eintrag aufgerufen wird, ignorieren.
-                    pass
-
-        self._emit("log", "Processing-Pipeline gestoppt.")
+                self.queue.task_done()
+            except ValueError:
+                # Falls task_done ohne passenden Eintrag aufgerufen wird, ignorieren.
+                pass
 
     def stop(self) -> None:
-        """Stoppt die Pipeline-Schleife kontrolliert."""
+        """Stoppt die Pipeline-Schleife kontrolliert (idempotent)."""
+        if self._stop_event.is_set():
+            # Stop laeuft bereits; ein zweites Sentinel wuerde stranden.
+            return
         self._stop_event.set()
+        if self.queue is not None and self._running:
+            self.queue.put(_STOP)
 
 
 @dataclass
@@ -105,6 +210,14 @@ class DocumentPipeline:
 
     backup_root: Path = Path("backup")
     output_root: Path = Path("output")
+    # Wird lazy aufgebaut und ueber alle Dokumente wiederverwendet.
+    _memory: Optional[ContextMemory] = field(default=None, init=False, repr=False)
+
+    def _get_memory(self) -> ContextMemory:
+        """Gibt das geteilte Langzeitgedaechtnis zurueck (einmaliger Aufbau)."""
+        if self._memory is None:
+            self._memory = ContextMemory()
+        return self._memory
 
     def process(self, file_path: str) -> Path:
         """Validiert, erstellt Backup, fuehrt OCR aus und sortiert das Dokument."""
@@ -114,9 +227,10 @@ class DocumentPipeline:
             raise FileNotFoundError(f"Datei nicht gefunden: {path}")
 
         logger.info("Starte Backup fuer Datei: %s", path.name)
-        backup_path = self._create_backup(path)
-        if not self._verify_backup(path, backup_path):
+        backup_path, source_hash = self._create_backup(path)
+        if not self._verify_backup(path, backup_path, source_hash=source_hash):
             raise RuntimeError(f"Backup-Integritaet fehlgeschlagen: {path.name}")
+        self._drop_page_cache(backup_path)
 
         logger.info("Starte OCR fuer Datei: %s", path.name)
         # Auge auf: OCR liefert Markdown aus dem Dokument.
@@ -125,7 +239,7 @@ class DocumentPipeline:
         del engine
 
         # Gedaechtnis: Kontext aus ChromaDB abrufen.
-        memory = ContextMemory()
+        memory = self._get_memory()
         history_context = memory.recall(markdown)
 
         # Gehirn an: LLM analysiert und liefert JSON-Entscheidung.
@@ -153,26 +267,107 @@ class DocumentPipeline:
         logger.info("Dokument verschoben nach %s", target_path)
         return target_path
 
-    def _create_backup(self, file_path: Path) -> Path:
-        """Erstellt ein Backup der Datei im datierten Ordner."""
-        date_folder = self.backup_root / date.today().isoformat()
-        date_folder.mkdir(parents=True, exist_ok=True)
+    def _create_backup(self, file_path: Path) -> tuple[Path, str | None]:
+        """Erstellt ein Backup; liefert den Quell-Hash, falls in user space kopiert wurde."""
+        date_folder = self.backup_root / _today_iso()
+        _ensure_dir(str(date_folder))
         backup_path = date_folder / file_path.name
-        shutil.copy2(file_path, backup_path)
-        return backup_path
-
-    def _verify_backup(self, source_path: Path, backup_path: Path) -> bool:
-        """Prueft die Integritaet des Backups via SHA256."""
-        source_hash = self._calculate_sha256(source_path)
-        backup_hash = self._calculate_sha256(backup_path)
-        logger.debug("SHA256 Quelle: %s", source_hash)
-        logger.debug("SHA256 Backup: %s", backup_hash)
+        if self._clone_file(file_path, backup_path):
+            # Kernel-Klon: kein Hash noetig, Verifikation laeuft ueber die Groesse.
+            return backup_path, None
+        source_hash = self._copy_with_hash(file_path, backup_path)
+        return backup_path, source_hash
+
+    @staticmethod
+    def _copy_with_hash(source_path: Path, backup_path: Path) -> str:
+        """Kopiert die Datei und hasht die Quelle im selben Lesedurchlauf."""
+        digest = hashlib.blake2b(digest_size=32)
+        # Fester Puffer + memoryview: keine neue bytes-Allokation pro Iteration,
+        # und update() gibt den GIL bei Bloecken dieser Groesse frei.
+        buffer = bytearray(1 << 20)
+        view = memoryview(buffer)
+        with source_path.open("rb", buffering=0) as src, backup_path.open("wb") as dst:
+            while count := src.readinto(buffer):
+                chunk = view[:count]
+                dst.write(chunk)
+                digest.update(chunk)
+        shutil.copystat(source_path, backup_path)
+        return digest.hexdigest()
+
+    @staticmethod
+    def _clone_file(source_path: Path, backup_path: Path) -> bool:
+        """Kopiert via os.copy_file_range (Reflink/CoW, wo das FS es kann)."""
+        if not hasattr(os, "copy_file_range"):
+            return False
+        try:
+            size = source_path.stat().st_size
+            with source_path.open("rb") as src, backup_path.open("wb") as dst:
+                remaining = size
+                while remaining > 0:
+                    copied = os.copy_file_range(src.fileno(), dst.fileno(), remaining)
+                    if copied == 0:
+                        break
+                    remaining -= copied
+            if remaining > 0:
+                logger.debug("copy_file_range unvollstaendig, nutze shutil-Fallback.")
+                backup_path.unlink(missing_ok=True)
+                return False
+            shutil.copystat(source_path, backup_path)
+            return True
+        except OSError as exc:
+            # EXDEV/ENOTSUP/EINVAL/EPERM: FS kann kein copy_file_range, leise zurueckfallen.
+            if exc.errno not in (errno.EXDEV, errno.ENOTSUP, errno.EINVAL, errno.EOPNOTSUPP, errno.EPERM):
+                logger.debug("copy_file_range fehlgeschlagen (%s), nutze Fallback.", exc)
+            backup_path.unlink(missing_ok=True)
+            return False
+
+    @staticmethod
+    def _drop_page_cache(file_path: Path) -> None:
+        """Wirft die Backup-Seiten aus dem Page-Cache; sie werden nicht mehr gelesen."""
+        if not hasattr(os, "posix_fadvise"):
+            return
+        try:
+            fd = os.open(file_path, os.O_RDONLY)
+            try:
+                os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+            finally:
+                os.close(fd)
+        except OSError:
+            # Nur ein Cache-Hinweis; Fehler sind unkritisch.
+            pass
+
+    def _verify_backup(
+        self, source_path: Path, backup_path: Path, source_hash: str | None = None
+    ) -> bool:
+        """Prueft die Integritaet des Backups via Groesse bzw. SHA256."""
+        if source_hash is None:
+            # Kernel-Kopien sind byte-identisch; Groesse + mtime genuegen.
+            source_stat = source_path.stat()
+            backup_stat = backup_path.stat()
+            return (
+                source_stat.st_size == backup_stat.st_size
+                and abs(source_stat.st_mtime - backup_stat.st_mtime) < 1.0
+            )
+        # Die Quelle wurde bereits beim Kopieren gehasht; nur das Backup lesen.
+        backup_hash = self._calculate_digest(backup_path)
+        logger.debug("Digest Quelle: %s", source_hash)
+        logger.debug("Digest Backup: %s", backup_hash)
         return source_hash == backup_hash
 
-    def _calculate_sha256(self, file_path: Path) -> str:
-        """Berechnet den SHA256-Hash fuer eine Datei."""
-        sha256 = hashlib.sha256()
-        with file_path.open("rb") as handle:
-            for chunk in iter(lambda: handle.read(8192), b""):
-                sha256.update(chunk)
-        return sha256.hexdigest()
+    def _calculate_digest(self, file_path: Path) -> str:
+        """Berechnet den BLAKE2b-Hash (256 Bit) fuer eine Datei."""
+        # BLAKE2b ist bei gleicher Kollisionssicherheit schneller als SHA-256,
+        # vor allem auf CPUs ohne SHA-NI; der Hash dient nur lokaler Integritaet.
+        with file_path.open("rb", buffering=0) as handle:
+            # Linux-Hint fuer aggressives Readahead beim sequenziellen Hash-Lauf.
+            if hasattr(os, "posix_fadvise"):
+                os.posix_fadvise(handle.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+            # Python 3.11+: file_digest laeuft komplett in C ohne Chunk-Schleife.
+            if hasattr(hashlib, "file_digest"):
+                digest = hashlib.file_digest(handle, lambda: hashlib.blake2b(digest_size=32))
+                return digest.hexdigest()
+            # Fallback fuer aeltere Versionen: Datei als einen Puffer mappen.
+            if file_path.stat().st_size == 0:
+                return hashlib.blake2b(digest_size=32).hexdigest()
+            with mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                return hashlib.blake2b(mapped, digest_size=32).hexdigest()
@@ -2,7 +2,11 @@
 
 from __future__ import annotations
 
+import heapq
+import itertools
 import logging
+import os
+import queue
 import threading
 import time
 from pathlib import Path
@@ -12,6 +16,9 @@ from watchdog.observers import Observer
 
 logger = logging.getLogger(__name__)
 
+# Sentinel zum Beenden des Scheduler-Threads.
+_STOP = object()
+
 
 class FileWatcher:
     """Ueberwacht rekursiv einen Ordner und legt fertige Dateien in eine Queue."""
@@ -21,86 +28,259 @@ class FileWatcher:
         self.input_path = Path(input_path)
         self.queue = queue
         self._observer = Observer()
-        self._handler = _DebouncedCreateHandler(self.queue)
+        self._scheduler = _StabilityScheduler(self.queue)
+        self._handler = _DebouncedCreateHandler(self._scheduler)
 
     def start(self) -> None:
         """Startet den Dateisystem-Observer."""
         self.input_path.mkdir(parents=True, exist_ok=True)
         self._observer.schedule(self._handler, str(self.input_path), recursive=True)
+        self._scheduler.start()
         self._observer.start()
+        self._initial_scan()
         logger.info("Dateiueberwachung gestartet: %s", self.input_path)
 
+    def _initial_scan(self) -> None:
+        """Reiht PDFs ein, die beim Start bereits im Input-Ordner liegen."""
+        now = time.time()
+        stack = [self.input_path]
+        while stack:
+            folder = stack.pop()
+            try:
+                entries = list(os.scandir(folder))
+            except OSError as exc:
+                logger.warning("Startscan fehlgeschlagen fuer %s: %s", folder, exc)
+                continue
+            for entry in entries:
+                path = Path(entry.path)
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(path)
+                    continue
+                if _is_temporary_file(path) or path.suffix.lower() != ".pdf":
+                    continue
+                try:
+                    mtime = entry.stat().st_mtime
+                except OSError:
+                    continue
+                if now - mtime >= 1.0:
+                    # Aeltere Dateien sind stabil und brauchen kein Debouncing.
+                    logger.info("Vorhandene Datei in Queue: %s", path)
+                    self.queue.put(str(path))
+                else:
+                    self._scheduler.submit(path)
+
     def stop(self) -> None:
-        """Stoppt den Observer sauber."""
+        """Stoppt Observer und Scheduler sauber."""
         self._observer.stop()
         self._observer.join()
+        self._scheduler.stop()
         logger.info("Dateiueberwachung gestoppt: %s", self.input_path)
 
 
 class _DebouncedCreateHandler(FileSystemEventHandler):
     """Handler fuer Debouncing bei neu angelegten Dateien."""
 
-    def __init__(self, queue) -> None:
-        # Queue zum Einreihen fertiger Dateien.
-        self.queue = queue
+    def __init__(self, scheduler: "_StabilityScheduler") -> None:
+        # Scheduler, der die Stabilitaetspruefung fuer alle Dateien buendelt.
+        self.scheduler = scheduler
 
     def on_created(self, event) -> None:
         """Reagiert auf neue Dateien."""
-        if event.is_directory:
+        path = self._relevant_path(event)
+        if path is None:
             return
+        logger.info("Datei erkannt: %s", path)
+        self.scheduler.submit(path)
 
-        path = Path(event.src_path)
-        if _is_temporary_file(path):
-            logger.debug("Temporaere Datei ignoriert: %s", path)
+    def on_closed(self, event) -> None:
+        """Reagiert auf IN_CLOSE_WRITE: Datei ist fertig geschrieben."""
+        path = self._relevant_path(event)
+        if path is None:
             return
+        # Kein Polling noetig; der Writer hat den Deskriptor geschlossen.
+        logger.info("Datei fertig geschrieben: %s", path)
+        self.scheduler.submit(path, closed=True)
 
-        if path.suffix.lower() != ".pdf":
-            logger.debug("Nicht-PDF ignoriert: %s", path)
-            return
+    @staticmethod
+    def _relevant_path(event) -> Path | None:
+        """Filtert Verzeichnisse, temporaere Dateien und Nicht-PDFs."""
+        if event.is_directory:
+            return None
 
-        threading.Thread(
-            target=self._debounce_and_enqueue,
-            args=(path,),
-            daemon=True,
-        ).start()
+        # Billige String-Checks vor der Path-Konstruktion: der Handler laeuft
+        # fuer jedes Dateisystem-Ereignis, auch fuer irrelevante Temp-Dateien.
+        src_path = event.src_path
+        name = os.path.basename(src_path)
+        if name[:1] in ".~":
+            logger.debug("Temporaere Datei ignoriert: %s", src_path)
+            return None
 
-    def _debounce_and_enqueue(self, path: Path) -> None:
-        """Wartet auf stabile Dateigroesse und legt den Pfad in die Queue."""
-        logger.info("Datei erkannt: %s", path)
-        time.sleep(1)
+        if not name.endswith((".pdf", ".PDF")) and name[-4:].lower() != ".pdf":
+            logger.debug("Nicht-PDF ignoriert: %s", src_path)
+            return None
 
-        last_size: int | None = None
-        stable_checks = 0
+        return Path(src_path)
 
-        for attempt in range(1, 11):
-            if not path.exists():
-                logger.warning("Datei nicht mehr vorhanden: %s", path)
-                return
 
+class _StabilityScheduler(threading.Thread):
+    """Ein einzelner Thread prueft alle Kandidaten auf stabile Dateigroesse.
+
+    Statt pro Datei einen Thread zu starten, verwaltet ein Heap die
+    naechsten Pruefzeitpunkte; auch bei Massen-Drops bleibt es bei einem Thread.
+    """
+
+    _MAX_ATTEMPTS = 10
+    _CHECK_INTERVAL = 1.0
+
+    def __init__(self, queue_out) -> None:
+        super().__init__(daemon=True, name="watcher-stability")
+        # Ziel-Queue fuer stabile Dateien.
+        self.queue_out = queue_out
+        self._incoming: queue.Queue = queue.Queue()
+        self._deadlines: list[tuple[float, int, Path]] = []
+        self._states: dict[Path, tuple[int | None, int, int]] = {}
+        # Pfad -> (Zeitstempel, (Groesse, mtime_ns)) der zuletzt eingereihten Datei.
+        self._enqueued_at: dict[Path, tuple[float, tuple[int, int] | None]] = {}
+        self._counter = itertools.count()
+
+    def submit(self, path: Path, closed: bool = False) -> None:
+        """Reiht eine Datei ein; closed=True ueberspringt die Stabilitaetspruefung."""
+        self._incoming.put((path, closed))
+
+    def stop(self) -> None:
+        """Beendet den Scheduler-Thread."""
+        self._incoming.put(_STOP)
+        if self.is_alive():
+            self.join(timeout=5)
+
+    def run(self) -> None:
+        """Verarbeitet Deadlines und neue Kandidaten in einer Schleife."""
+        while True:
+            timeout = self._next_timeout()
             try:
-                current_size = path.stat().st_size
-            except OSError as exc:
-                logger.warning("Datei konnte nicht gelesen werden (%s): %s", exc, path)
-                time.sleep(1)
+                item = self._incoming.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+            if item is _STOP:
+                return
+            if item is not None:
+                path, closed = item
+                if closed:
+                    self._finalize(path)
+                else:
+                    self._schedule(path)
+            self._process_due()
+
+    def _next_timeout(self) -> float | None:
+        """Wartezeit bis zur naechsten Deadline oder unbegrenzt."""
+        if not self._deadlines:
+            return None
+        return max(0.0, self._deadlines[0][0] - time.monotonic())
+
+    def _schedule(self, path: Path) -> None:
+        """Legt eine Datei mit erstem Pruefzeitpunkt in den Heap."""
+        if self._recently_enqueued(path):
+            return
+        if path not in self._states:
+            self._states[path] = (None, 0, 0)
+        heapq.heappush(
+            self._deadlines,
+            (time.monotonic() + self._CHECK_INTERVAL, next(self._counter), path),
+        )
+
+    def _finalize(self, path: Path) -> None:
+        """Reiht eine fertige Datei in die Ziel-Queue ein (mit Dedup)."""
+        if self._recently_enqueued(path):
+            return
+        if not path.exists():
+            logger.warning("Datei nicht mehr vorhanden: %s", path)
+            self._states.pop(path, None)
+            return
+        self._states.pop(path, None)
+        self._enqueued_at[path] = (time.monotonic(), self._stat_key(path))
+        self.queue_out.put(str(path))
+
+    @staticmethod
+    def _stat_key(path: Path) -> tuple[int, int] | None:
+        """Identitaet des Dateiinhalts: (Groesse, mtime_ns) oder None."""
+        try:
+            stat = path.stat()
+        except OSError:
+            return None
+        return (stat.st_size, stat.st_mtime_ns)
+
+    def _recently_enqueued(self, path: Path) -> bool:
+        """Dedupliziert create/close-Ereignisse derselben Datei.
+
+        Der Vergleich laeuft ueber (Groesse, mtime_ns), nicht nur ueber den
+        Pfad: legt ein Scanner nach dem Abtransport eine neue Datei unter
+        demselben Namen ab, ist das ein neues Dokument und kein Duplikat.
+        """
+        now = time.monotonic()
+        # Alte Eintraege aufraeumen, damit die Map klein bleibt.
+        for seen_path, (stamp, _) in list(self._enqueued_at.items()):
+            if now - stamp > 60.0:
+                del self._enqueued_at[seen_path]
+        entry = self._enqueued_at.get(path)
+        if entry is None:
+            return False
+        _, seen_key = entry
+        current_key = self._stat_key(path)
+        if seen_key is None or current_key is None or current_key != seen_key:
+            # Anderer Inhalt (oder Datei weg) unter demselben Pfad: neu pruefen.
+            del self._enqueued_at[path]
+            return False
+        return True
+
+    def _process_due(self) -> None:
+        """Prueft alle faelligen Dateien auf stabile Groesse."""
+        now = time.monotonic()
+        while self._deadlines and self._deadlines[0][0] <= now:
+            _, _, path = heapq.heappop(self._deadlines)
+            state = self._states.get(path)
+            if state is None:
                 continue
+            self._check_file(path, state)
 
-            if last_size is not None and current_size == last_size:
-                stable_checks += 1
-            else:
-                stable_checks = 0
+    def _check_file(self, path: Path, state: tuple[int | None, int, int]) -> None:
+        """Einzelpruefung: Groesse vergleichen und ggf. neu einplanen."""
+        last_size, stable_checks, attempts = state
 
-            if stable_checks >= 1:
-                logger.info("Datei stabil, in Queue: %s", path)
-                self.queue.put(str(path))
-                return
+        if not path.exists():
+            logger.warning("Datei nicht mehr vorhanden: %s", path)
+            self._states.pop(path, None)
+            return
+
+        try:
+            current_size = path.stat().st_size
+        except OSError as exc:
+            logger.warning("Datei konnte nicht gelesen werden (%s): %s", exc, path)
+            current_size = None
 
-            last_size = current_size
-            logger.debug(
-                "Dateigroesse noch instabil (Versuch %d/10): %s", attempt, path
-            )
-            time.sleep(1)
+        if current_size is not None and last_size is not None and current_size == last_size:
+            stable_checks += 1
+        else:
+            stable_checks = 0
+
+        if stable_checks >= 1:
+            logger.info("Datei stabil, in Queue: %s", path)
+            self._finalize(path)
+            return
+
+        attempts += 1
+        if attempts >= self._MAX_ATTEMPTS:
+            logger.warning("Datei blieb instabil, uebersprungen: %s", path)
+            self._states.pop(path, None)
+            return
 
-        logger.warning("Datei blieb instabil, uebersprungen: %s", path)
+        logger.debug(
+            "Dateigroesse noch instabil (Versuch %d/%d): %s", attempts, self._MAX_ATTEMPTS, path
+        )
+        self._states[path] = (current_size, stable_checks, attempts)
+        heapq.heappush(
+            self._deadlines,
+            (time.monotonic() + self._CHECK_INTERVAL, next(self._counter), path),
+        )
 
 
 def _is_temporary_file(path: Path) -> bool:
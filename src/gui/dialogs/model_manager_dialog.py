@@ -2,7 +2,12 @@
 
 from __future__ import annotations
 
+import importlib.util
+import os
+import time
 from dataclasses import dataclass
+from enum import Enum
+from functools import partial
 from pathlib import Path
 import shutil
 from typing import Callable
@@ -23,6 +28,14 @@ from PyQt6.QtWidgets import (
 from src.core.config import Config
 
 
+class InstallState(Enum):
+    """Dreistufiger Installationszustand eines Modells."""
+
+    MISSING = "Fehlt"
+    PARTIAL = "Unvollstaendig"
+    COMPLETE = "Installiert"
+
+
 @dataclass(frozen=True)
 class ModelInfo:
     """Beschreibung eines unterstuetzten Modells."""
@@ -47,7 +60,14 @@ class DownloadThread(QThread):
     def run(self) -> None:
         """Startet den Snapshot-Download und meldet Fortschritt."""
         try:
+            # hf_transfer (Rust-Backend) laedt Shards mit parallelen
+            # Range-Requests und saettigt damit auch schnelle Leitungen.
+            # Das Env-Flag muss vor dem huggingface_hub-Import gesetzt sein.
+            if importlib.util.find_spec("hf_transfer") is not None:
+                os.environ.setdefault("HF_HUB_ENABLE_HF_TRANSFER", "1")
             from huggingface_hub import snapshot_download
+            from huggingface_hub.utils import HfHubHTTPError
+            from requests.exceptions import RequestException
             from tqdm.auto import tqdm
 
             self.status_changed.emit("Download gestartet")
@@ -60,19 +80,44 @@ class DownloadThread(QThread):
             class SignalTqdm(tqdm):
                 """TQDM-Adapter fuer Fortschrittsmeldungen in der GUI."""
 
+                # Der Balken zeigt ohnehin nur ganze Prozent; nur bei einer
+                # Aenderung emittieren, statt pro Download-Chunk einen
+                # Qt-Signal-Hop ueber die Thread-Grenze zu bezahlen.
+                _last_percent = -1
+
                 def update(self, n: int = 1) -> None:  # type: ignore[override]
                     super().update(n)
                     if self.total:
                         percent = int(self.n / self.total * 100)
-                        emit_progress(percent)
-
-            snapshot_download(
-                repo_id=self.repo_id,
-                local_dir=str(self.target_dir),
-                local_dir_use_symlinks=False,
-                resume_download=True,
-                tqdm_class=SignalTqdm,
-            )
+                        if percent != self._last_percent:
+                            self._last_percent = percent
+                            emit_progress(percent)
+
+            # Transiente Hub-/Netzwerkfehler nicht an den Nutzer durchreichen:
+            # resume_download setzt nach jedem Versuch dort fort, wo der
+            # letzte abbrach, daher kosten Retries kaum Bandbreite.
+            for attempt in range(10):
+                try:
+                    snapshot_download(
+                        repo_id=self.repo_id,
+                        local_dir=str(self.target_dir),
+                        # Kein use_symlinks=False mehr: so kann der Hub grosse
+                        # Shards aus dem zentralen Cache verlinken statt kopieren.
+                        resume_download=True,
+                        tqdm_class=SignalTqdm,
+                        # Mehrere Dateien parallel holen; grosse Repos bestehen aus
+                        # vielen Shards, die sich unabhaengig herunterladen lassen.
+                        max_workers=8,
+                    )
+                    break
+                except (HfHubHTTPError, RequestException) as exc:
+                    if attempt == 9:
+                        raise
+                    delay = min(60, 2**attempt)
+                    self.status_changed.emit(
+                        f"Netzwerkfehler, neuer Versuch in {delay}s ({attempt + 1}/10): {exc}"
+                    )
+                    time.sleep(delay)
             self.progress_changed.emit(100)
             self.status_changed.emit("Download abgeschlossen")
             self.finished_with_result.emit(True, "")
@@ -89,9 +134,15 @@ class ModelManagerDialog(QDialog):
         self.config = config
         self.models_path = self.config.get_model_path()
         self.models_path.mkdir(parents=True, exist_ok=True)
+        # Gemeinsamer Hub-Blobstore neben den Modellordnern: erneute
+        # Installationen verlinken vorhandene Shards, statt sie neu zu laden.
+        os.environ.setdefault("HF_HOME", str(self.models_path / ".hf_cache"))
 
         self.supported_models = self._build_supported_models(config)
         self.active_threads: dict[int, DownloadThread] = {}
+        # Install-Status pro repo_id cachen; _populate_table und
+        # any_model_missing fragen sonst mehrfach pro Refresh nach.
+        self._installed_cache: dict[str, InstallState] = {}
         self.progress_widgets: dict[int, QProgressBar] = {}
         self.action_buttons: dict[int, QPushButton] = {}
 
@@ -107,6 +158,14 @@ class ModelManagerDialog(QDialog):
         self.table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
 
         main_layout.addWidget(self.table)
+
+        # Ein Klick statt drei: alle fehlenden Modelle parallel laden.
+        # Die DownloadThreads sind unabhaengig und I/O-gebunden, daher
+        # skaliert der Erst-Setup nahezu mit der Anzahl der Modelle.
+        self.download_all_button = QPushButton("Alle fehlenden herunterladen", self)
+        self.download_all_button.clicked.connect(self._download_all)
+        main_layout.addWidget(self.download_all_button)
+
         self._populate_table()
 
     @staticmethod
@@ -132,41 +191,57 @@ class ModelManagerDialog(QDialog):
 
     def _populate_table(self) -> None:
         """Fuellt die Tabelle mit Modellinformationen."""
-        for row, info in enumerate(self.supported_models):
-            name_item = QTableWidgetItem(info.name)
-            type_item = QTableWidgetItem(info.model_type)
-            self.table.setItem(row, 0, name_item)
-            self.table.setItem(row, 1, type_item)
-            self._refresh_row(row)
+        # Updates und Signale waehrend des Befuellens aussetzen; jedes
+        # setItem/setCellWidget wuerde sonst einzeln ein Relayout ausloesen.
+        self.table.setUpdatesEnabled(False)
+        self.table.blockSignals(True)
+        try:
+            for row, info in enumerate(self.supported_models):
+                name_item = QTableWidgetItem(info.name)
+                type_item = QTableWidgetItem(info.model_type)
+                self.table.setItem(row, 0, name_item)
+                self.table.setItem(row, 1, type_item)
+                self._refresh_row(row)
+        finally:
+            self.table.blockSignals(False)
+            self.table.setUpdatesEnabled(True)
 
         self.table.resizeColumnsToContents()
 
     def _refresh_row(self, row: int) -> None:
         """Aktualisiert Status und Aktion fuer eine Zeile."""
         model_info = self.supported_models[row]
-        installed = self._is_model_installed(model_info.repo_id)
-        status_text = "Installiert" if installed else "Fehlt"
-        status_item = QTableWidgetItem(status_text)
+        state = self._install_state(model_info.repo_id)
+        status_item = QTableWidgetItem(state.value)
         status_item.setFlags(status_item.flags() & ~Qt.ItemFlag.ItemIsEditable)
         self.table.setItem(row, 2, status_item)
-        self._set_action_widget(row, installed)
+        self._set_action_widget(row, state)
 
-    def _set_action_widget(self, row: int, installed: bool) -> None:
+    def _set_action_widget(self, row: int, state: InstallState) -> None:
         """Erzeugt das Aktionsfeld mit Button und Fortschrittsbalken."""
         container = QWidget(self)
         layout = QHBoxLayout(container)
         layout.setContentsMargins(0, 0, 0, 0)
 
-        action_button = QPushButton("Loeschen" if installed else "Download", container)
+        if state is InstallState.COMPLETE:
+            label = "Loeschen"
+        elif state is InstallState.PARTIAL:
+            label = "Fortsetzen"
+        else:
+            label = "Download"
+        action_button = QPushButton(label, container)
         progress_bar = QProgressBar(container)
         progress_bar.setRange(0, 100)
         progress_bar.setValue(0)
         progress_bar.setVisible(False)
 
-        if installed:
-            action_button.clicked.connect(lambda: self._delete_model(row))
+        # partial statt Lambda: billiger pro Emission und sauber per
+        # Identitaet trennbar, ohne Closure-Zellen auf alte Zeilen.
+        if state is InstallState.COMPLETE:
+            action_button.clicked.connect(partial(self._delete_model, row))
         else:
-            action_button.clicked.connect(lambda: self._start_download(row))
+            # snapshot_download setzt unvollstaendige Downloads selbst fort.
+            action_button.clicked.connect(partial(self._start_download, row))
 
         layout.addWidget(action_button)
         layout.addWidget(progress_bar)
@@ -180,9 +255,47 @@ class ModelManagerDialog(QDialog):
         return self.models_path / self._model_folder(repo_id)
 
     def _is_model_installed(self, repo_id: str) -> bool:
-        """Prueft, ob ein Modell lokal installiert ist."""
+        """Prueft gecacht, ob ein Modell lokal vollstaendig installiert ist."""
+        return self._install_state(repo_id) is InstallState.COMPLETE
+
+    def _install_state(self, repo_id: str) -> InstallState:
+        """Liefert den gecachten Installationszustand eines Modells."""
+        cached = self._installed_cache.get(repo_id)
+        if cached is None:
+            cached = self._probe_model(repo_id)
+            self._installed_cache[repo_id] = cached
+        return cached
+
+    def _probe_model(self, repo_id: str) -> InstallState:
+        """Validiert den lokalen Snapshot statt nur auf Dateien zu pruefen."""
         model_dir = self._model_dir(repo_id)
-        return model_dir.exists() and any(model_dir.iterdir())
+        if not model_dir.exists() or not any(model_dir.iterdir()):
+            return InstallState.MISSING
+        # Abgebrochene Downloads hinterlassen Marker-Dateien des Hubs.
+        if any(path.suffix in (".incomplete", ".lock") for path in model_dir.rglob("*")):
+            return InstallState.PARTIAL
+        try:
+            from huggingface_hub import snapshot_download
+            from huggingface_hub.utils import LocalEntryNotFoundError
+        except ImportError:
+            # Ohne Hub-Bibliothek bleibt nur der einfache Dateicheck.
+            return InstallState.COMPLETE
+        try:
+            # local_files_only prueft billig gegen refs/ und erkennt damit
+            # auch abgebrochene Downloads ohne Marker-Dateien.
+            snapshot_download(repo_id=repo_id, local_dir=str(model_dir), local_files_only=True)
+        except LocalEntryNotFoundError:
+            return InstallState.PARTIAL
+        return InstallState.COMPLETE
+
+    def _download_all(self) -> None:
+        """Startet fuer jedes fehlende Modell einen parallelen Download."""
+        for row, info in enumerate(self.supported_models):
+            if row in self.active_threads:
+                continue
+            if self._is_model_installed(info.repo_id):
+                continue
+            self._start_download(row)
 
     def _start_download(self, row: int) -> None:
         """Startet einen Download-Thread fuer das gewaehlte Modell."""
@@ -197,11 +310,9 @@ class ModelManagerDialog(QDialog):
 
         thread = DownloadThread(model_info.repo_id, target_dir, self)
         thread.progress_changed.connect(progress_bar.setValue)
-        thread.status_changed.connect(lambda text: self._update_status_text(row, text))
-        thread.finished_with_result.connect(
-            lambda success, message: self._handle_download_finished(row, success, message)
-        )
-        thread.finished.connect(lambda: self._cleanup_thread(row))
+        thread.status_changed.connect(partial(self._update_status_text, row))
+        thread.finished_with_result.connect(partial(self._handle_download_finished, row))
+        thread.finished.connect(partial(self._cleanup_thread, row))
         self.active_threads[row] = thread
         thread.start()
 
@@ -222,6 +333,7 @@ class ModelManagerDialog(QDialog):
 
         if not success:
             QMessageBox.warning(self, "Download fehlgeschlagen", message or "Unbekannter Fehler")
+        self._installed_cache.pop(self.supported_models[row].repo_id, None)
         self._refresh_row(row)
 
     def _cleanup_thread(self, row: int) -> None:
@@ -232,6 +344,7 @@ class ModelManagerDialog(QDialog):
         """Loescht das Modellverzeichnis, um Speicher freizugeben."""
         model_info = self.supported_models[row]
         model_dir = self._model_dir(model_info.repo_id)
+        self._installed_cache.pop(model_info.repo_id, None)
         if not model_dir.exists():
             self._refresh_row(row)
             return
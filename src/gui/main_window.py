@@ -4,13 +4,13 @@ from __future__ import annotations
 
 from pathlib import Path
 
-from PIL import Image
 from PyQt6 import QtWidgets
 from PyQt6.QtCore import QDir, QModelIndex, Qt, QTimer, QUrl, pyqtSignal
 from PyQt6.QtGui import (
     QAction,
     QColor,
     QDesktopServices,
+    QIcon,
     QPalette,
     QStandardItem,
     QStandardItemModel,
@@ -18,6 +18,7 @@ from PyQt6.QtGui import (
 from PyQt6.QtWidgets import (
     QApplication,
     QFileDialog,
+    QFileIconProvider,
     QMainWindow,
     QSplitter,
     QTextEdit,
@@ -49,6 +50,13 @@ def apply_dark_theme(app: QApplication) -> None:
     app.setPalette(palette)
 
 
+class _NullIconProvider(QFileIconProvider):
+    """Liefert leere Icons und spart so Stat-/Shell-Lookups pro Zeile."""
+
+    def icon(self, _info) -> QIcon:  # type: ignore[override]
+        return QIcon()
+
+
 class MainWindow(QMainWindow):
     """Dashboard mit Dateibaum, Scan-Ansicht und Log-Konsole."""
 
@@ -66,9 +74,18 @@ class MainWindow(QMainWindow):
         self.resize(1280, 720)
 
         self.tree_view = QTreeView(self)
+        # Das Modell lebt ueber die gesamte Fensterlaufzeit; QFileSystemModel
+        # beobachtet Aenderungen selbst, der Fallback wird gebatcht neu gebaut.
+        self._refresh_pending = False
+        # Verzeichnislisten pro (Pfad, mtime) cachen; unveraenderte Ordner
+        # muessen beim Fallback-Rebuild nicht erneut gelistet werden.
+        self._dir_listing_cache: dict[str, tuple[int, list[tuple[str, bool]]]] = {}
+        # Muss das Modell ueberleben; Qt uebernimmt den Provider nicht.
+        self._icon_provider = _NullIconProvider()
         self.file_model = self._create_file_model()
         self.tree_view.setModel(self.file_model)
         self._apply_tree_root()
+        self._hide_detail_columns()
         self.tree_view.setHeaderHidden(False)
 
         self.scan_view = ScanView(self)
@@ -78,6 +95,13 @@ class MainWindow(QMainWindow):
         self.log_view.setStyleSheet(
             "background-color: #0b0f0b; color: #39ff14; font-family: Consolas, monospace;"
         )
+        # Jede append-Operation loest Layout- und Scrollbar-Berechnung aus;
+        # Zeilen werden daher gesammelt und alle 50 ms als ein Block angefuegt.
+        self._log_buffer: list[str] = []
+        self._log_timer = QTimer(self)
+        self._log_timer.setInterval(50)
+        self._log_timer.timeout.connect(self._flush_log)
+        self._log_timer.start()
 
         right_splitter = QSplitter(Qt.Orientation.Vertical, self)
         right_splitter.addWidget(self.scan_view)
@@ -94,7 +118,6 @@ class MainWindow(QMainWindow):
 
         self._build_toolbar()
         QTimer.singleShot(0, self._ensure_models_available)
-        _ = Image
 
     def _build_toolbar(self) -> None:
         """Erzeugt die Haupt-Toolbar mit Aktionen."""
@@ -129,15 +152,47 @@ class MainWindow(QMainWindow):
         worker.update_overlay.connect(self.scan_view.draw_boxes)
         worker.file_processed.connect(self._refresh_tree)
 
+    _LOG_BUFFER_LIMIT = 1000
+
     def append_log(self, message: str) -> None:
-        """Fuegt dem Log-Fenster eine neue Zeile hinzu."""
-        self.log_view.append(message)
+        """Puffert eine Log-Zeile; der Timer fuegt sie gebuendelt an."""
+        self._log_buffer.append(message)
+        if len(self._log_buffer) > self._LOG_BUFFER_LIMIT:
+            # Aelteste Zeilen verwerfen, bevor der Puffer unbegrenzt waechst.
+            del self._log_buffer[: len(self._log_buffer) - self._LOG_BUFFER_LIMIT]
+
+    def _flush_log(self) -> None:
+        """Fuegt alle gepufferten Zeilen als einen Block ans Log-Fenster an."""
+        if not self._log_buffer:
+            return
+        text = "\n".join(self._log_buffer)
+        self._log_buffer.clear()
+        self.log_view.append(text)
 
     def _refresh_tree(self, _path: str | None = None) -> None:
         """Aktualisiert den Dateibaum fuer neue Inhalte."""
-        self.file_model = self._create_file_model()
+        if not isinstance(self.file_model, QStandardItemModel):
+            # QFileSystemModel/QDirModel beobachten das Dateisystem selbst;
+            # setRootPath ist ein No-Op, solange sich der Pfad nicht aendert.
+            if hasattr(self.file_model, "setRootPath"):
+                self.file_model.setRootPath(self.output_path)
+            self._apply_tree_root()
+            return
+
+        # Fallback-Modell: Refreshes pro Batch zusammenfassen, statt den
+        # kompletten Baum fuer jede einzelne Datei neu zu bauen.
+        if self._refresh_pending:
+            return
+        self._refresh_pending = True
+        QTimer.singleShot(200, self._flush_refresh)
+
+    def _flush_refresh(self) -> None:
+        """Baut das Fallback-Modell einmal fuer alle gesammelten Aenderungen."""
+        self._refresh_pending = False
+        self.file_model = self._build_fallback_model()
         self.tree_view.setModel(self.file_model)
         self._apply_tree_root()
+        self._hide_detail_columns()
 
     def _open_config(self) -> None:
         """Oeffnet die Konfiguration oder laesst eine Datei auswaehlen."""
@@ -186,10 +241,21 @@ class MainWindow(QMainWindow):
         model = model_class(self)
         if hasattr(model, "setFilter"):
             model.setFilter(QDir.Filter.AllDirs | QDir.Filter.Files | QDir.Filter.NoDotAndDotDot)
+        if hasattr(model, "setIconProvider"):
+            # Leere Icons: QFileSystemModel statet sonst jede sichtbare Zeile
+            # fuer Icon-Aufloesung (unter Windows inkl. Shell-Extensions).
+            model.setIconProvider(self._icon_provider)
+        if hasattr(model, "setOption") and hasattr(model_class, "Option"):
+            model.setOption(model_class.Option.DontUseCustomDirectoryIcons, True)
         if hasattr(model, "setRootPath"):
             model.setRootPath(self.output_path)
         return model
 
+    def _hide_detail_columns(self) -> None:
+        """Blendet Groesse/Typ/Datum aus; jede Spalte kostet einen stat pro Zeile."""
+        for column in (1, 2, 3):
+            self.tree_view.setColumnHidden(column, True)
+
     def _apply_tree_root(self) -> None:
         """Setzt den Root-Knoten fuer den Dateibaum."""
         if not hasattr(self.file_model, "index"):
@@ -216,11 +282,27 @@ class MainWindow(QMainWindow):
 
     def _populate_tree(self, parent_item: QStandardItem, directory: Path) -> None:
         """Fuegt rekursiv Unterordner und Dateien zum Fallback-Modell hinzu."""
-        if not directory.exists():
-            return
-        for entry in sorted(directory.iterdir(), key=lambda item: (item.is_file(), item.name.lower())):
-            item = QStandardItem(entry.name)
+        for name, is_dir in self._list_directory(directory):
+            item = QStandardItem(name)
             item.setEditable(False)
             parent_item.appendRow(item)
-            if entry.is_dir():
-                self._populate_tree(item, entry)
+            if is_dir:
+                self._populate_tree(item, directory / name)
+
+    def _list_directory(self, directory: Path) -> list[tuple[str, bool]]:
+        """Listet einen Ordner sortiert; unveraenderte mtime nutzt den Cache."""
+        try:
+            mtime_ns = directory.stat().st_mtime_ns
+        except OSError:
+            return []
+        key = str(directory)
+        cached = self._dir_listing_cache.get(key)
+        if cached is not None and cached[0] == mtime_ns:
+            return cached[1]
+        try:
+            entries = [(entry.name, entry.is_dir()) for entry in directory.iterdir()]
+        except OSError:
+            entries = []
+        entries.sort(key=lambda item: (not item[1], item[0].lower()))
+        self._dir_listing_cache[key] = (mtime_ns, entries)
+        return entries
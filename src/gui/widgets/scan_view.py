@@ -2,10 +2,13 @@
 
 from __future__ import annotations
 
-from PIL import Image
+from pathlib import Path
+
 from PyQt6.QtCore import Qt
 from PyQt6.QtGui import QBrush, QColor, QImage, QPen, QPixmap
 from PyQt6.QtWidgets import (
+    QGraphicsItem,
+    QGraphicsItemGroup,
     QGraphicsPixmapItem,
     QGraphicsRectItem,
     QGraphicsScene,
@@ -15,6 +18,11 @@ from PyQt6.QtWidgets import (
 )
 
 
+# Formate, die Qt selbst dekodiert (libpng/libjpeg-turbo mit SIMD);
+# nur fuer alles andere faellt die Ansicht auf Pillow zurueck.
+_QT_NATIVE_SUFFIXES = {".png", ".jpg", ".jpeg", ".bmp"}
+
+
 class ScanView(QWidget):
     """Zeigt das aktuelle Dokument und optionale Overlays an."""
 
@@ -33,51 +41,71 @@ class ScanView(QWidget):
         layout.addWidget(self.view)
 
         self._pixmap_item: QGraphicsPixmapItem | None = None
-        self._box_items: list[QGraphicsRectItem] = []
-        self._image_buffer: bytes | None = None
+        # Alle Overlay-Rechtecke haengen an einer Gruppe, damit ein Wechsel
+        # die Szene nur einmal statt pro Rechteck invalidiert.
+        self._box_group: QGraphicsItemGroup | None = None
+        # Pen und Brush einmal anlegen; setPen/setBrush kopieren ohnehin,
+        # die Neukonstruktion pro draw_boxes-Aufruf ist reine Allokation.
+        self._overlay_pen = QPen(QColor(57, 255, 20))
+        self._overlay_pen.setWidth(2)
+        self._overlay_brush = QBrush(QColor(57, 255, 20, 80))
 
     def show_image(self, image_path: str) -> None:
         """Laedt ein Bild und skaliert es auf die Breite der Ansicht."""
         if not image_path:
             return
 
-        pil_image = Image.open(image_path).convert("RGBA")
-        self._image_buffer = pil_image.tobytes("raw", "RGBA")
-        width, height = pil_image.size
-        qimage = QImage(
-            self._image_buffer,
-            width,
-            height,
-            QImage.Format.Format_RGBA8888,
-        )
-        pixmap = QPixmap.fromImage(qimage)
+        pixmap = QPixmap()
+        if Path(image_path).suffix.lower() in _QT_NATIVE_SUFFIXES:
+            # Qt laedt Standardformate direkt und ohne Python-Zwischenkopie.
+            pixmap = QPixmap(image_path)
+        if pixmap.isNull():
+            pixmap = self._load_via_pillow(image_path)
+        if pixmap.isNull():
+            return
 
         self.scene.clear()
-        self._box_items.clear()
+        self._box_group = None
         self._pixmap_item = self.scene.addPixmap(pixmap)
         self._fit_width()
 
+    @staticmethod
+    def _load_via_pillow(image_path: str) -> QPixmap:
+        """Fallback fuer Formate, die Qt nicht nativ dekodieren kann."""
+        from PIL import Image
+
+        try:
+            pil_image = Image.open(image_path).convert("RGBA")
+        except OSError:
+            return QPixmap()
+        buffer = pil_image.tobytes("raw", "RGBA")
+        width, height = pil_image.size
+        qimage = QImage(buffer, width, height, QImage.Format.Format_RGBA8888)
+        # fromImage kopiert die Daten; der Puffer muss nur bis hier leben.
+        return QPixmap.fromImage(qimage)
+
     def draw_boxes(self, boxes: list) -> None:
         """Zeichnet halbtransparente Rechtecke ueber dem Dokument."""
-        for item in self._box_items:
-            self.scene.removeItem(item)
-        self._box_items.clear()
+        if self._box_group is not None:
+            # Eine removeItem-Operation fuer die ganze Gruppe statt O(N)
+            # einzelner Entfernungen, die jedes Mal den BSP-Index umbauen.
+            self.scene.removeItem(self._box_group)
+            self._box_group = None
 
         if not boxes:
             return
 
-        pen = QPen(QColor(57, 255, 20))
-        pen.setWidth(2)
-        brush = QBrush(QColor(57, 255, 20, 80))
-
+        group = self.scene.createItemGroup([])
         for box in boxes:
             x, y, width, height = box
             rect = QGraphicsRectItem(x, y, width, height)
-            rect.setPen(pen)
-            rect.setBrush(brush)
-            rect.setZValue(10)
-            self.scene.addItem(rect)
-            self._box_items.append(rect)
+            rect.setPen(self._overlay_pen)
+            rect.setBrush(self._overlay_brush)
+            # Gerasterte Rechtecke ueber Repaints hinweg cachen (Scrollen).
+            rect.setCacheMode(QGraphicsItem.CacheMode.DeviceCoordinateCache)
+            group.addToGroup(rect)
+        group.setZValue(10)
+        self._box_group = group
 
     def resizeEvent(self, event) -> None:
         """Passt die Skalierung bei Groessenanpassungen an."""
@@ -4,7 +4,6 @@ from __future__ import annotations
 
 from typing import Callable
 
-from PIL import Image
 from PyQt6.QtCore import QThread, pyqtSignal
 
 from src.core.pipeline import ProcessingPipeline
@@ -52,4 +51,3 @@ class PipelineWorker(QThread):
             self.pipeline.callbacks = callbacks
 
         self._callbacks_registered = True
-        _ = Image
@@ -0,0 +1,18 @@
+"""Prozessweiter Cache fuer HuggingFace-Tokenizer.
+
+from_pretrained liest tokenizer.json neu ein und baut den Merge-Trie
+bei jedem Aufruf auf; das kostet 50-200 ms pro Dokument. Alle Module
+dieses Pakets beziehen ihre Tokenizer deshalb ueber diesen Cache.
+"""
+
+from __future__ import annotations
+
+from functools import lru_cache
+
+
+@lru_cache(maxsize=None)
+def get_tokenizer(model_id: str):
+    """Laedt einen Tokenizer einmal pro model_id (use_fast fuer das Rust-Backend)."""
+    from transformers import AutoTokenizer
+
+    return AutoTokenizer.from_pretrained(model_id, use_fast=True)
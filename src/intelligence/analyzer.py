@@ -2,18 +2,35 @@
 
 from __future__ import annotations
 
+import inspect
 import logging
 import os
 import tempfile
 from typing import Any
 
-import fitz
-from transformers import AutoTokenizer
+# fitz, PIL und transformers werden erst beim ersten OCR-Lauf importiert;
+# allein transformers kostet beim Import Sekunden und hunderte MB RAM.
+# Bitte keine Top-Level-Imports dieser Pakete wieder einfuehren.
 
 from src.core.model_manager import ModelManager
+from src.intelligence._tokenizer_cache import get_tokenizer
 
 logger = logging.getLogger(__name__)
 
+_OCR_PROMPT = "<image>\n<|grounding|>Convert the document to markdown."
+
+# RAM-backed tmpfs, falls das Modell zwingend einen Dateipfad erwartet;
+# dann beruehrt das Zwischenbild wenigstens nicht die Platte.
+_RAM_TMP_DIR = "/dev/shm" if os.path.isdir("/dev/shm") else None
+
+
+def _accepts_image_kwarg(infer: Any) -> bool:
+    """Prueft, ob infer ein PIL-Bild direkt entgegennimmt."""
+    try:
+        return "image" in inspect.signature(infer).parameters
+    except (TypeError, ValueError):
+        return False
+
 
 def _extract_markdown(result: Any) -> str:
     """Versucht, den Markdown-Text aus dem Modellresultat zu extrahieren."""
@@ -27,33 +44,57 @@ def _extract_markdown(result: Any) -> str:
     return str(result)
 
 
-def analyze_document(pdf_path: str) -> str:
+def analyze_document(pdf_path: str, target_dpi: int = 144) -> str:
     """Analysiert die erste Seite eines PDFs per DeepSeek-OCR-2."""
+    import fitz
+    from PIL import Image
+
     logger.info("Starte OCR-Analyse fuer %s.", pdf_path)
     manager = ModelManager.instance()
     model = manager.get_model("ocr")
     model_id = manager.model_ids["ocr"]
-    tokenizer = AutoTokenizer.from_pretrained(model_id)
+    tokenizer = get_tokenizer(model_id)
 
     image_path = None
+    pil_image = None
     try:
-        with fitz.open(pdf_path) as doc:
+        # filetype="pdf" ueberspringt das Format-Sniffing beim Oeffnen.
+        with fitz.open(pdf_path, filetype="pdf") as doc:
             if doc.page_count == 0:
                 logger.warning("PDF %s enthaelt keine Seiten.", pdf_path)
                 return ""
+            # Nur Seite 0 behalten; bei dicken Scans entfaellt damit die
+            # Traversierung des restlichen Seitenbaums.
+            doc.select([0])
             page = doc.load_page(0)
-            pixmap = page.get_pixmap()
-
-            with tempfile.NamedTemporaryFile(suffix=".png", delete=False) as tmp_file:
-                image_path = tmp_file.name
-            pixmap.save(image_path)
-            logger.debug("OCR-Bild gespeichert unter %s.", image_path)
-
-        result = model.infer(
-            tokenizer,
-            prompt="<image>\n<|grounding|>Convert the document to markdown.",
-            image_file=image_path,
-        )
+            # Direkt in der Zielaufloesung des OCR rendern statt bei 72 DPI;
+            # sonst skaliert das Modell intern ein zweites Mal.
+            scale = target_dpi / 72
+            pixmap = page.get_pixmap(
+                matrix=fitz.Matrix(scale, scale), alpha=False, colorspace=fitz.csRGB
+            )
+
+            if _accepts_image_kwarg(model.infer):
+                # Kein PNG-Umweg: Rohpixel direkt als PIL-Bild uebergeben,
+                # statt zu encodieren, auf Platte zu schreiben und wieder zu lesen.
+                if hasattr(pixmap, "pil_image"):
+                    pil_image = pixmap.pil_image()
+                else:
+                    pil_image = Image.frombytes(
+                        "RGB", (pixmap.width, pixmap.height), pixmap.samples
+                    )
+            else:
+                with tempfile.NamedTemporaryFile(
+                    suffix=".png", delete=False, dir=_RAM_TMP_DIR
+                ) as tmp_file:
+                    image_path = tmp_file.name
+                pixmap.save(image_path)
+                logger.debug("OCR-Bild gespeichert unter %s.", image_path)
+
+        if pil_image is not None:
+            result = model.infer(tokenizer, prompt=_OCR_PROMPT, image=pil_image)
+        else:
+            result = model.infer(tokenizer, prompt=_OCR_PROMPT, image_file=image_path)
         markdown = _extract_markdown(result)
         logger.info("OCR-Analyse abgeschlossen fuer %s.", pdf_path)
         return markdown
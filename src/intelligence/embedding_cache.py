@@ -0,0 +1,51 @@
+"""Prozessweiter LRU-Cache fuer Text-Embeddings.
+
+ContextMemory und NamingEngine embedden denselben Text oft direkt
+hintereinander (recall gefolgt von remember, wiederkehrende Inhalte in
+suggest_name). Ein Cache-Treffer erspart den kompletten
+Transformer-Forward des Embedding-Modells.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any
+
+_MAX_ENTRIES = 1024
+
+_cache: "OrderedDict[str, Any]" = OrderedDict()
+_lock = threading.Lock()
+
+
+def _key(text: str, normalized: bool) -> str:
+    """Bildet den Cache-Schluessel aus Normalisierungs-Flag und Text-Hash.
+
+    Derselbe Text liefert je nach normalize_embeddings einen anderen
+    Vektor; ohne das Flag im Schluessel wuerde z. B. ein roher Vektor der
+    NamingEngine spaeter als normalisierter Treffer in den Inner-Product-
+    Index von ContextMemory gelangen und das Ranking verzerren.
+    """
+    prefix = "n:" if normalized else "r:"
+    return prefix + hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def get(text: str, normalized: bool = False) -> Any | None:
+    """Liefert den gecachten Vektor oder None bei einem Miss."""
+    key = _key(text, normalized)
+    with _lock:
+        vector = _cache.get(key)
+        if vector is not None:
+            _cache.move_to_end(key)
+        return vector
+
+
+def put(text: str, vector: Any, normalized: bool = False) -> None:
+    """Legt einen Vektor ab und verdraengt bei Bedarf den aeltesten Eintrag."""
+    key = _key(text, normalized)
+    with _lock:
+        _cache[key] = vector
+        _cache.move_to_end(key)
+        while len(_cache) > _MAX_ENTRIES:
+            _cache.popitem(last=False)
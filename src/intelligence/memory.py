@@ -2,14 +2,17 @@
 
 from __future__ import annotations
 
+import hashlib
 import logging
-from typing import List
+import re
+from typing import List, Tuple
 from uuid import uuid4
 
 import chromadb
 from sentence_transformers import SentenceTransformer
 
 from src.core.model_manager import ModelManager
+from src.intelligence import embedding_cache
 
 logger = logging.getLogger(__name__)
 
@@ -23,6 +26,20 @@ class ContextMemory:
             name=collection_name,
         )
         self._embedding_model = self._load_embedding_model()
+        # Optionaler FAISS-Index: exakte SIMD-Suche ohne Chroma-Query-Pfad.
+        self._faiss_index = None
+        # Numpy-Fallback: dieselben Vektoren als float32-Matrix fuer eine
+        # reine GEMV-Suche, wenn faiss fehlt, aber numpy vorhanden ist.
+        self._np_matrix = None
+        self._vector_meta: List[Tuple[str, str, str]] = []
+        # Lokale Metadaten-Tabelle id -> (summary, filename, folder): recall
+        # fragt Chroma dann nur noch nach ids/distances statt alle Dokumente
+        # und Metadaten pro Query zurueckzuserialisieren.
+        self._meta: dict[str, Tuple[str, str, str]] = {}
+        # Hashes der normalisierten Zusammenfassungen: Duplikate (z. B.
+        # wiederkehrende Rechnungen) ueberspringen encode und Insert komplett.
+        self._seen: set[bytes] = set()
+        self._load_persisted()
 
     def _load_embedding_model(self) -> SentenceTransformer:
         """Laedt das Embedding-Modell ueber den ModelManager oder lokal."""
@@ -30,28 +47,150 @@ class ContextMemory:
         embedding_model = manager.get_embedding_model()
         if embedding_model is None:
             logger.warning("Embedding-Modell fehlte im Manager, lade lokal.")
-            return SentenceTransformer("sentence-transformers/all-MiniLM-L6-v2", device="cpu")
+            import torch
+
+            # Nur im lokalen Fallback: vorhandene GPU mitnehmen. Der Manager
+            # haelt das Embedding bewusst auf der CPU (int8-ONNX, und die GPU
+            # gehoert OCR/LLM).
+            device = "cuda" if torch.cuda.is_available() else "cpu"
+            model = SentenceTransformer("sentence-transformers/all-MiniLM-L6-v2", device=device)
+            return manager._compile_embedding_model(model)
         return embedding_model
 
+    def _load_persisted(self) -> None:
+        """Laedt Bestandsdaten einmalig aus Chroma in Tabelle und Index."""
+        if self._collection.count() == 0:
+            return
+        data = self._collection.get(include=["embeddings", "documents", "metadatas"])
+        ids = data.get("ids") or []
+        documents = data.get("documents") or []
+        metadatas = data.get("metadatas") or []
+        for doc_id, document, meta in zip(ids, documents, metadatas):
+            meta = meta or {}
+            self._meta[doc_id] = (
+                document,
+                meta.get("filename", "unbekannt"),
+                meta.get("folder", "Unbekannt"),
+            )
+            self._seen.add(self._summary_key(document))
+        self._init_vector_index(data.get("embeddings"))
+
+    def _init_vector_index(self, embeddings) -> None:
+        """Baut den Vektor-Index (FAISS, sonst Numpy-Matrix) aus dem Bestand."""
+        if embeddings is None or len(embeddings) == 0:
+            return
+        try:
+            import numpy as np
+        except ImportError:
+            logger.debug("numpy nicht installiert, recall nutzt Chroma direkt.")
+            return
+        matrix = np.asarray(embeddings, dtype="float32")
+        # Reihenfolge entspricht der get-Reihenfolge, aus der auch _meta kam.
+        self._vector_meta.extend(self._meta.values())
+        try:
+            import faiss
+        except ImportError:
+            logger.debug("faiss-cpu nicht installiert, recall rechnet per GEMV.")
+            self._np_matrix = matrix
+            return
+        # Inner Product entspricht Kosinus, da die Vektoren normalisiert sind.
+        self._faiss_index = faiss.IndexFlatIP(matrix.shape[1])
+        self._faiss_index.add(matrix)
+
+    def _index_vector(self, embedding: List[float], document: str, filename: str, folder: str) -> None:
+        """Fuegt einen neuen Vektor dem Index hinzu (Index entsteht lazy)."""
+        try:
+            import numpy as np
+        except ImportError:
+            return
+        vector = np.asarray(embedding, dtype="float32").reshape(1, -1)
+        try:
+            import faiss
+        except ImportError:
+            # Anfuegen ist O(N), aber Inserts sind selten gegen Recalls.
+            self._np_matrix = (
+                vector if self._np_matrix is None else np.vstack((self._np_matrix, vector))
+            )
+            self._vector_meta.append((document, filename, folder))
+            return
+        if self._faiss_index is None:
+            self._faiss_index = faiss.IndexFlatIP(vector.shape[1])
+        self._faiss_index.add(vector)
+        self._vector_meta.append((document, filename, folder))
+
     def _embed_texts(self, texts: List[str]) -> List[List[float]]:
-        """Erstellt Embeddings fuer eine Liste von Texten."""
-        embeddings = self._embedding_model.encode(texts, normalize_embeddings=True)
-        return [embedding.tolist() for embedding in embeddings]
+        """Erstellt Embeddings fuer eine Liste von Texten (mit Cache)."""
+        # normalized=True: nur Einheitsvektoren passen zum Inner-Product-Index.
+        vectors = [embedding_cache.get(text, normalized=True) for text in texts]
+        miss_indices = [index for index, vector in enumerate(vectors) if vector is None]
+        if miss_indices:
+            # Nur die Cache-Misses durch das Modell schicken.
+            misses = [texts[index] for index in miss_indices]
+            # encode sortiert intern nach Laenge (Smart Batching) und hebt
+            # die Sortierung wieder auf; batch_size>1 lohnt bei remember_many.
+            computed = self._embedding_model.encode(
+                misses,
+                batch_size=64,
+                normalize_embeddings=True,
+                convert_to_numpy=True,
+                show_progress_bar=False,
+            )
+            for index, vector in zip(miss_indices, computed):
+                vectors[index] = vector
+                embedding_cache.put(texts[index], vector, normalized=True)
+        return [
+            vector.tolist() if hasattr(vector, "tolist") else list(vector)
+            for vector in vectors
+        ]
 
     def remember(self, filename: str, folder: str, text_summary: str) -> None:
         """Speichert eine neue Datei-Zusammenfassung als Vektor."""
-        if not text_summary.strip():
-            logger.debug("Leere Zusammenfassung, Kontext wird nicht gespeichert.")
+        self.remember_many([(filename, folder, text_summary)])
+
+    def remember_many(self, items: List[Tuple[str, str, str]]) -> None:
+        """Speichert mehrere (filename, folder, summary)-Tripel in einem Batch.
+
+        Ein encode-Aufruf fuer alle Zusammenfassungen plus ein Bulk-Insert
+        ist deutlich guenstiger als N Einzelaufrufe mit Batchgroesse 1.
+        """
+        entries: List[Tuple[str, str, str]] = []
+        batch_keys: set[bytes] = set()
+        for filename, folder, summary in items:
+            if not summary.strip():
+                continue
+            key = self._summary_key(summary)
+            if key in self._seen or key in batch_keys:
+                logger.debug("Duplikat-Zusammenfassung fuer %s, ueberspringe.", filename)
+                continue
+            batch_keys.add(key)
+            entries.append((filename, folder, summary))
+        if not entries:
+            logger.debug("Keine neuen Zusammenfassungen, Kontext wird nicht gespeichert.")
             return
-        document_id = str(uuid4())
-        logger.debug("Speichere Kontext fuer %s mit ID %s.", filename, document_id)
-        embedding = self._embed_texts([text_summary])[0]
+
+        summaries = [summary for _, _, summary in entries]
+        embeddings = self._embed_texts(summaries)
+        ids = [str(uuid4()) for _ in entries]
+        for (filename, _, _), document_id in zip(entries, ids):
+            logger.debug("Speichere Kontext fuer %s mit ID %s.", filename, document_id)
         self._collection.add(
-            ids=[document_id],
-            documents=[text_summary],
-            embeddings=[embedding],
-            metadatas=[{"filename": filename, "folder": folder}],
+            ids=ids,
+            documents=summaries,
+            embeddings=embeddings,
+            metadatas=[
+                {"filename": filename, "folder": folder} for filename, folder, _ in entries
+            ],
         )
+        self._seen.update(batch_keys)
+        for (filename, folder, summary), embedding, document_id in zip(entries, embeddings, ids):
+            self._meta[document_id] = (summary, filename, folder)
+            self._index_vector(embedding, summary, filename, folder)
+
+    @staticmethod
+    def _summary_key(summary: str) -> bytes:
+        """Hash der whitespace-normalisierten, kleingeschriebenen Zusammenfassung."""
+        normalized = re.sub(r"\s+", " ", summary.strip().lower())
+        return hashlib.sha256(normalized.encode("utf-8")).digest()
 
     def recall(self, text_content: str, k: int = 3) -> str:
         """Liefert den aehnlichsten Kontext als String fuer das LLM."""
@@ -65,22 +204,54 @@ class ContextMemory:
             return "Keine historischen Dokumente gefunden."
 
         query_embedding = self._embed_texts([text_content])[0]
+        if self._faiss_index is not None and self._faiss_index.ntotal > 0:
+            return self._recall_faiss(query_embedding, k)
+        if self._np_matrix is not None and len(self._np_matrix) > 0:
+            return self._recall_numpy(query_embedding, k)
+        # Nur ids/distances anfordern; Dokumente und Metadaten kommen aus der
+        # lokalen Tabelle statt durch Chromas Ser/De-Schicht.
         result = self._collection.query(
             query_embeddings=[query_embedding],
             n_results=k,
-            include=["documents", "metadatas", "distances"],
+            include=["distances"],
         )
-        documents = result.get("documents", [[]])[0]
-        metadatas = result.get("metadatas", [[]])[0]
-        if not documents:
+        ids = result.get("ids", [[]])[0]
+        if not ids:
             return "Keine historischen Dokumente gefunden."
 
-        history_lines = []
-        for index, (doc, meta) in enumerate(zip(documents, metadatas), start=1):
-            filename = (meta or {}).get("filename", "unbekannt")
-            folder = (meta or {}).get("folder", "Unbekannt")
-            history_lines.append(
-                f"Ähnliches Dokument {index}: Abgelegt unter '{folder}' als '{filename}'. "
-                f"Zusammenfassung: {doc}"
-            )
-        return "\n".join(history_lines)
+        # Parallel-Listen statt Dict pro Treffer; eine Comprehension plus
+        # ein join, ohne Zwischenallokationen in der Schleife.
+        hits = [self._meta.get(doc_id, ("", "unbekannt", "Unbekannt")) for doc_id in ids]
+        return self._format_hits(hits)
+
+    def _recall_faiss(self, query_embedding: List[float], k: int) -> str:
+        """Sucht die k aehnlichsten Eintraege im FAISS-Index."""
+        import numpy as np
+
+        query = np.asarray(query_embedding, dtype="float32").reshape(1, -1)
+        _scores, indices = self._faiss_index.search(query, min(k, self._faiss_index.ntotal))
+        hits = [self._vector_meta[match_index] for match_index in indices[0] if match_index >= 0]
+        if not hits:
+            return "Keine historischen Dokumente gefunden."
+        return self._format_hits(hits)
+
+    def _recall_numpy(self, query_embedding: List[float], k: int) -> str:
+        """Exakte Inner-Product-Suche als eine SIMD-GEMV ueber die Matrix."""
+        import numpy as np
+
+        query = np.asarray(query_embedding, dtype="float32")
+        scores = self._np_matrix @ query
+        k = min(k, scores.shape[0])
+        # argpartition ist O(N) statt O(N log N) eines vollen Sorts.
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return self._format_hits([self._vector_meta[index] for index in top])
+
+    @staticmethod
+    def _format_hits(hits: List[Tuple[str, str, str]]) -> str:
+        """Formatiert Treffer-Tripel als Historienblock fuer das LLM."""
+        return "\n".join(
+            f"Ähnliches Dokument {rank}: Abgelegt unter '{folder}' als '{filename}'. "
+            f"Zusammenfassung: {document}"
+            for rank, (document, filename, folder) in enumerate(hits, start=1)
+        )
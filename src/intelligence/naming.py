@@ -9,9 +9,10 @@ from typing import Any, List
 
 import chromadb
 import torch
-from transformers import AutoTokenizer
 
 from src.core.model_manager import ModelManager
+from src.intelligence import embedding_cache
+from src.intelligence._tokenizer_cache import get_tokenizer
 
 logger = logging.getLogger(__name__)
 
@@ -30,12 +31,17 @@ class NamingEngine:
         self.embedding_model_id = self.manager.model_ids["embedding"]
 
     def _embed_text(self, content: str) -> List[float]:
-        """Erstellt ein Embedding fuer den angegebenen Text."""
+        """Erstellt ein Embedding fuer den angegebenen Text (mit Cache)."""
+        cached = embedding_cache.get(content)
+        if cached is not None:
+            return cached.tolist() if hasattr(cached, "tolist") else list(cached)
+
         if hasattr(self.embedding_model, "encode"):
             embedding = self.embedding_model.encode(content)
+            embedding_cache.put(content, embedding)
             return embedding.tolist() if hasattr(embedding, "tolist") else list(embedding)
 
-        tokenizer = AutoTokenizer.from_pretrained(self.embedding_model_id)
+        tokenizer = get_tokenizer(self.embedding_model_id)
         inputs = tokenizer(content, return_tensors="pt", truncation=True)
         device = (
             self.embedding_model.device
@@ -48,7 +54,9 @@ class NamingEngine:
             outputs = self.embedding_model(**inputs)
         hidden_state = outputs.last_hidden_state
         pooled = hidden_state.mean(dim=1).squeeze(0)
-        return pooled.detach().cpu().tolist()
+        result = pooled.detach().cpu().tolist()
+        embedding_cache.put(content, result)
+        return result
 
     def learn(self, filename: str, content: str) -> None:
         """Speichert das Embedding zusammen mit Metadaten in ChromaDB."""
@@ -87,7 +95,7 @@ class NamingEngine:
             )
 
         llm_model = self.manager.get_model("llm")
-        llm_tokenizer = AutoTokenizer.from_pretrained(self.manager.model_ids["llm"])
+        llm_tokenizer = get_tokenizer(self.manager.model_ids["llm"])
         prompt = (
             "Hier ist ein Dokumenteninhalt: "
             f"{content}. Hier sind ähnliche Dokumente aus der Vergangenheit: "
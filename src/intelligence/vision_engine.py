@@ -3,10 +3,15 @@
 from __future__ import annotations
 
 import gc
+import hashlib
 import logging
+import os
+import tempfile
+from functools import lru_cache
 from pathlib import Path
 from typing import List
 
+import numpy as np
 import torch
 from PIL import Image
 from transformers import AutoProcessor
@@ -19,48 +24,326 @@ logger = logging.getLogger(__name__)
 _OCR_PROMPT = "<image>\n<|grounding|>Convert the document to markdown."
 
 
+@lru_cache(maxsize=4)
+def _get_processor(model_id: str) -> AutoProcessor:
+    """Laedt den AutoProcessor einmal pro model_id.
+
+    Die Pipeline baut pro Dokument eine VisionEngine; ohne Cache wuerde
+    jedes Mal die Tokenizer- und Preprocessor-Konfiguration neu geparst.
+    """
+    return AutoProcessor.from_pretrained(model_id)
+
+
 class VisionEngine:
     """Stellt die OCR-Schnittstelle fuer DeepSeek-OCR-2 bereit."""
 
     _OCR_PROMPT = _OCR_PROMPT
 
+    # Vier Seiten pro Forward-Pass: lastet die Tensor-Cores im Prefill aus,
+    # ohne den VRAM-Bedarf fuer die 2048-Token-Generierung zu sprengen.
+    _BATCH_SIZE = 4
+
+    # Obergrenze fuer den Seiten-Dedup-Cache pro Dokument; 16 Bytes Digest
+    # plus Markdown pro Eintrag, der Deckel ist nur ein Sicherheitsnetz.
+    _PAGE_CACHE_LIMIT = 256
+
     def __init__(self, model_id: str = "deepseek-ai/DeepSeek-OCR-2") -> None:
+        self._configure_cuda_allocator()
         self._model_manager = ModelManager.instance()
         self._model_id = model_id
-        self._processor = AutoProcessor.from_pretrained(model_id)
+        # Per Umgebungsvariable uebersteuerbar, z. B. OCR_BATCH=8 auf
+        # grossen GPUs oder OCR_BATCH=1 bei knappem VRAM.
+        try:
+            self._batch_size = max(1, int(os.environ.get("OCR_BATCH", self._BATCH_SIZE)))
+        except ValueError:
+            logger.warning("Ungueltiger OCR_BATCH-Wert, nutze %d.", self._BATCH_SIZE)
+            self._batch_size = self._BATCH_SIZE
+        self._processor = _get_processor(model_id)
+        self._target_long_px = self._probe_target_edge(self._processor)
         # Standardordner fuer OCR-Outputs, falls das Modell einen Ablagepfad erwartet.
         self._output_dir = Path("output") / "ocr_cache"
 
+    @staticmethod
+    def _probe_target_edge(processor) -> int | None:
+        """Liest die erwartete lange Bildkante aus der Processor-Konfiguration.
+
+        Pixel oberhalb dieser Kante skaliert der Processor sofort wieder
+        herunter; dann lohnt es nicht, sie ueberhaupt zu rastern. Ohne
+        size-Angabe bleibt es beim bisherigen Zoom 3.
+        """
+        size = getattr(getattr(processor, "image_processor", None), "size", None)
+        if not isinstance(size, dict):
+            return None
+        for key in ("longest_edge", "height", "shortest_edge"):
+            value = size.get(key)
+            if isinstance(value, int) and value > 0:
+                return value
+        return None
+
+    @staticmethod
+    def _configure_cuda_allocator() -> None:
+        """Aktiviert expandable_segments, bevor der erste CUDA-Alloc passiert.
+
+        Die variablen Aktivierungsgroessen pro Seite fragmentieren den
+        Caching-Allocator; mit CUDA-VMM erscheinen nicht zusammenhaengende
+        physische Bloecke als ein Segment, und das OOM-auf-Seite-2-Muster
+        samt Defrag-Stalls entfaellt.
+        """
+        if not torch.cuda.is_available():
+            return
+        os.environ.setdefault(
+            "PYTORCH_CUDA_ALLOC_CONF", "expandable_segments:True,max_split_size_mb:128"
+        )
+        try:
+            # Greift auch, wenn Torch die Umgebungsvariable schon gelesen hat.
+            torch.cuda.memory._set_allocator_settings("expandable_segments:True")
+        except (AttributeError, RuntimeError):
+            # Aeltere Torch-Versionen kennen die Einstellung nicht.
+            logger.debug("expandable_segments wird von dieser Torch-Version nicht unterstuetzt.")
+
     def process_document(self, file_path: str) -> str:
         """Fuehrt OCR auf allen PDF-Seiten aus und liefert Markdown zurueck."""
         logger.info("Starte OCR fuer Datei %s", file_path)
-        markdown_parts: List[str] = []
+        # Fertige Seiten landen sofort in einer Spool-Datei statt in einer
+        # Liste: so liegt nie das ganze Dokument doppelt (Teile plus join-
+        # Ergebnis) im RAM, nur der finale String einmal beim Rueckweg.
+        markdown_file = tempfile.TemporaryFile("w+", encoding="utf-8")
 
-        images = pdf_to_images(file_path)
+        # pdf_to_images rendert die naechste Seite bereits auf einem
+        # Hintergrund-Thread vor; hier wird nur noch konsumiert und gebatcht.
+        images = pdf_to_images(file_path, target_long_px=self._target_long_px)
         try:
-            for page_index, image in enumerate(images, start=1):
-                logger.info("Seite %d wird verarbeitet...", page_index)
+            batch: List[np.ndarray] = []
+            page_index = 0
+            pages_written = 0
+            # Digest -> Markdown fuer identische Seiten (Leerseiten,
+            # wiederholte Trennblaetter): die OCR laeuft pro Pixelinhalt
+            # nur einmal pro Dokument.
+            page_cache: dict[bytes, str] = {}
+
+            def _flush_batch() -> None:
+                nonlocal page_index, pages_written
+                if not batch:
+                    return
+                first_page = page_index + 1
+                page_index += len(batch)
+                logger.info("Seiten %d-%d werden verarbeitet...", first_page, page_index)
                 try:
-                    markdown = self._run_inference_with_retry(image)
+                    for part in self._run_batch_deduped(batch, page_cache):
+                        if pages_written:
+                            markdown_file.write("\n\n")
+                        markdown_file.write(part)
+                        pages_written += 1
                 finally:
-                    # Bild sofort freigeben, um Speicher zu sparen.
-                    del image
-                    # Nach jeder Seite aktiv aufraeumen, um RAM/VRAM zu entlasten.
-                    gc.collect()
-                    if torch.cuda.is_available():
-                        torch.cuda.empty_cache()
-                markdown_parts.append(markdown)
-                logger.info("Seite %d verarbeitet.", page_index)
+                    # Bilder sofort freigeben, um Speicher zu sparen.
+                    # Kein empty_cache pro Batch: der Caching-Allocator
+                    # verwendet die freien Bloecke direkt wieder, ein
+                    # Flush wuerde sie nur teuer neu per cudaMalloc holen.
+                    batch.clear()
+                logger.info("Seiten %d-%d verarbeitet.", first_page, page_index)
+
+            for image in images:
+                batch.append(image)
+                if len(batch) == self._batch_size:
+                    _flush_batch()
+            _flush_batch()
+
+            markdown_file.seek(0)
+            return markdown_file.read()
         finally:
-            # Generator freigeben, um Speicher zu sparen.
+            markdown_file.close()
+            # Ein einziges Aufraeumen am Dokumentende genuegt.
             del images
             gc.collect()
             if torch.cuda.is_available():
                 torch.cuda.empty_cache()
 
-        return "\n\n".join(markdown_parts)
+    @staticmethod
+    def _autocast_dtype() -> torch.dtype:
+        """BF16 auf Ampere und neuer, FP16 auf aelteren GPUs ohne BF16."""
+        if torch.cuda.is_available() and not torch.cuda.is_bf16_supported():
+            return torch.float16
+        return torch.bfloat16
+
+    def _generation_kwargs(self, images: List[np.ndarray] | None = None) -> dict:
+        """Gemeinsame generate-Parameter mit EOS-Fruehstopp und Seitenbudget."""
+        tokenizer = self._processor.tokenizer
+        pad_token_id = tokenizer.pad_token_id
+        if pad_token_id is None:
+            pad_token_id = tokenizer.eos_token_id
+        max_new_tokens = 1536
+        if images:
+            # Das Budget richtet sich nach der dichtesten Seite im Batch;
+            # EOS stoppt weiterhin frueher, das Budget ist nur die Obergrenze.
+            max_new_tokens = max(self._estimate_token_budget(image) for image in images)
+        return {
+            "max_new_tokens": max_new_tokens,
+            "do_sample": False,
+            # Greedy mit KV-Cache explizit festnageln.
+            "num_beams": 1,
+            "use_cache": True,
+            "eos_token_id": tokenizer.eos_token_id,
+            "pad_token_id": pad_token_id,
+        }
+
+    @staticmethod
+    def _estimate_token_budget(image: np.ndarray) -> int:
+        """Schaetzt das Decode-Budget ueber den Tintenanteil der Seite.
+
+        Titel- und Leerseiten erzeugen nur wenige Markdown-Tokens; ohne
+        Schaetzung dekodiert generate dort trotzdem gegen das volle Budget,
+        falls das Modell kein sauberes EOS liefert.
+        """
+        if not isinstance(image, np.ndarray):
+            return 1536
+        # Grobes Downsampling haelt die Schaetzung bei ~1 ms pro Seite.
+        sample = image[::8, ::8]
+        ink_ratio = float((sample < 200).mean())
+        # Eine volle Textseite hat ~12% dunkle Pixel und ~1500 Tokens.
+        return max(256, min(1536, int(ink_ratio * 12000)))
+
+    @staticmethod
+    def _move_inputs(inputs: dict, device: torch.device, model_dtype: torch.dtype) -> dict:
+        """Verschiebt Processor-Tensoren aufs Geraet (gepinnt und async auf CUDA).
+
+        Pinned Host-Memory erlaubt DMA-Kopien mit non_blocking=True, die
+        sich hinter den noch laufenden Kernels der vorigen Seite verstecken;
+        ohne CUDA wird nicht gepinnt, das waere reine Zusatzarbeit.
+        Float-Tensoren (Pixelwerte) kommen gleich im Modell-Dtype an, sonst
+        castet jeder Layer die FP32-Eingabe erneut.
+        """
+        use_cuda = device.type == "cuda"
+        moved = {}
+        for key, value in inputs.items():
+            if use_cuda:
+                value = value.pin_memory()
+            moved[key] = value.to(
+                device,
+                dtype=model_dtype if value.is_floating_point() else None,
+                non_blocking=use_cuda,
+            )
+        return moved
+
+    @staticmethod
+    def _page_digest(image: np.ndarray) -> bytes | None:
+        """128-Bit-blake2b ueber die rohen Pixel (ohne tobytes-Kopie, wenn moeglich)."""
+        if not isinstance(image, np.ndarray):
+            return None
+        buffer = image.data if image.flags["C_CONTIGUOUS"] else image.tobytes()
+        return hashlib.blake2b(buffer, digest_size=16).digest()
+
+    def _run_batch_deduped(self, batch: List[np.ndarray], page_cache: dict[bytes, str]) -> List[str]:
+        """OCR fuer einen Batch, bei der pixelidentische Seiten nur einmal laufen."""
+        digests = [self._page_digest(image) for image in batch]
+        results: List[str | None] = [
+            page_cache.get(digest) if digest is not None else None for digest in digests
+        ]
+        pending: List[int] = []
+        scheduled: set[bytes] = set()
+        for index, (digest, text) in enumerate(zip(digests, results)):
+            if text is not None:
+                continue
+            if digest is not None and digest in scheduled:
+                # Duplikat innerhalb des Batches: wird unten aus dem Cache geloest.
+                continue
+            pending.append(index)
+            if digest is not None:
+                scheduled.add(digest)
+        cached_count = len(batch) - len(pending)
+        if cached_count:
+            logger.debug("%d Seite(n) aus dem Dedup-Cache uebernommen.", cached_count)
+        if pending:
+            fresh = self._run_batch_with_retry([batch[index] for index in pending])
+            for index, text in zip(pending, fresh):
+                results[index] = text
+                digest = digests[index]
+                if digest is None:
+                    continue
+                if len(page_cache) >= self._PAGE_CACHE_LIMIT:
+                    # Aeltesten Eintrag verdraengen (dict haelt Einfuegereihenfolge).
+                    page_cache.pop(next(iter(page_cache)))
+                page_cache[digest] = text
+        return [
+            text if text is not None else page_cache.get(digests[index], "")
+            for index, text in enumerate(results)
+        ]
+
+    @staticmethod
+    def _maybe_compile(model: torch.nn.Module) -> torch.nn.Module:
+        """Kompiliert den forward des OCR-Modells einmalig (best effort).
+
+        Das Flag haengt am Modell selbst, das der ModelManager cacht; so
+        passiert die Kompilierung genau einmal pro Prozess und nicht pro
+        Dokument. Schlaegt torch.compile fehl (fehlender Compiler, exotische
+        Architektur), laeuft das Modell unveraendert im Eager-Modus weiter.
+        """
+        if getattr(model, "_ldm_compiled", False) or not hasattr(torch, "compile"):
+            return model
+        try:
+            model.forward = torch.compile(model.forward, mode="reduce-overhead", fullgraph=False)
+            logger.debug("OCR-Modell-forward mit torch.compile kompiliert.")
+        except Exception:  # noqa: BLE001 - compile ist rein optional.
+            logger.debug("torch.compile fuer das OCR-Modell fehlgeschlagen, bleibe eager.")
+        # Auch nach einem Fehlschlag markieren, sonst wird pro Batch erneut versucht.
+        model._ldm_compiled = True
+        return model
+
+    def _run_batch_with_retry(self, batch: List[np.ndarray]) -> List[str]:
+        """OCR fuer einen Seiten-Batch; halbiert die Batchgroesse bei CUDA-OOM."""
+        model = self._maybe_compile(self._model_manager.load_model(self._model_id))
+
+        if hasattr(model, "infer"):
+            # Erst einen Batch-Aufruf versuchen; infer nimmt bereits eine
+            # Liste entgegen und amortisiert dann Prefill und Kernel-Launch.
+            if len(batch) > 1:
+                try:
+                    result = self._call_model_infer(model, batch)
+                except RuntimeError:
+                    result = None
+                if isinstance(result, list) and len(result) == len(batch):
+                    return [self._normalize_result(part) for part in result]
+                logger.debug("Batch-infer unbrauchbar, falle auf Einzelaufrufe zurueck.")
+            return [self._run_inference_with_retry(image) for image in batch]
+
+        size = len(batch)
+        while True:
+            try:
+                parts: List[str] = []
+                for start in range(0, len(batch), size):
+                    parts.extend(self._run_batch_generate(model, batch[start : start + size]))
+                return parts
+            except RuntimeError as exc:
+                if "CUDA out of memory" not in str(exc) or size == 1:
+                    raise
+                size = max(1, size // 2)
+                logger.warning("CUDA OOM erkannt, reduziere Batchgroesse auf %d.", size)
+                gc.collect()
+                if torch.cuda.is_available():
+                    torch.cuda.empty_cache()
+
+    def _run_batch_generate(self, model, images: List[np.ndarray]) -> List[str]:
+        """Ein gemeinsamer generate-Aufruf fuer mehrere Seiten."""
+        inputs = self._processor(
+            text=[self._OCR_PROMPT] * len(images),
+            images=images,
+            return_tensors="pt",
+            padding=True,
+        )
+        device = next(model.parameters()).device
+        model_dtype = next(model.parameters()).dtype
+        inputs = self._move_inputs(inputs, device, model_dtype)
+
+        generation_kwargs = self._generation_kwargs(images)
+        with torch.inference_mode():
+            if device.type == "cuda":
+                with torch.autocast("cuda", dtype=self._autocast_dtype()):
+                    outputs = model.generate(**inputs, **generation_kwargs)
+            else:
+                outputs = model.generate(**inputs, **generation_kwargs)
+
+        return self._processor.batch_decode(outputs, skip_special_tokens=True)
 
-    def _run_inference_with_retry(self, image: Image.Image) -> str:
+    def _run_inference_with_retry(self, image: np.ndarray) -> str:
         """Fuehrt die OCR-Inferenz aus und behandelt CUDA-OOM Fehler."""
         try:
             return self._run_inference(image)
@@ -73,27 +356,30 @@ class VisionEngine:
                 torch.cuda.empty_cache()
             return self._run_inference(image)
 
-    def _run_inference(self, image: Image.Image) -> str:
+    def _run_inference(self, image: np.ndarray) -> str:
         """Ruft das DeepSeek-OCR-2 Modell auf und gibt Markdown zurueck."""
-        model = self._model_manager.load_model(self._model_id)
+        model = self._maybe_compile(self._model_manager.load_model(self._model_id))
 
         if hasattr(model, "infer"):
-            result = self._call_model_infer(model, image)
+            result = self._call_model_infer(model, [image])
             return self._normalize_result(result)
 
         inputs = self._processor(text=self._OCR_PROMPT, images=image, return_tensors="pt")
         device = next(model.parameters()).device
-        inputs = {key: value.to(device) for key, value in inputs.items()}
+        model_dtype = next(model.parameters()).dtype
+        inputs = self._move_inputs(inputs, device, model_dtype)
 
+        generation_kwargs = self._generation_kwargs([image])
         with torch.inference_mode():
-            outputs = model.generate(**inputs, max_new_tokens=2048)
+            if device.type == "cuda":
+                with torch.autocast("cuda", dtype=self._autocast_dtype()):
+                    outputs = model.generate(**inputs, **generation_kwargs)
+            else:
+                outputs = model.generate(**inputs, **generation_kwargs)
 
+        # inputs/outputs fallen per Refcount am Funktionsende; der
+        # Caching-Allocator recycelt die Bloecke ohne cudaFree.
         text = self._processor.batch_decode(outputs, skip_special_tokens=True)
-        del inputs
-        del outputs
-        gc.collect()
-        if torch.cuda.is_available():
-            torch.cuda.empty_cache()
         return "\n".join(text)
 
     def _ensure_output_dir(self) -> Path:
@@ -101,15 +387,19 @@ class VisionEngine:
         self._output_dir.mkdir(parents=True, exist_ok=True)
         return self._output_dir
 
-    def _call_model_infer(self, model: torch.nn.Module, image: Image.Image) -> object:
-        """Ruft model.infer mit einem festen Keyword-Call auf."""
+    def _call_model_infer(self, model: torch.nn.Module, images_payload: List[np.ndarray]) -> object:
+        """Ruft model.infer mit einem festen Keyword-Call auf (Liste von Seiten)."""
         output_kwargs = {"output_path": str(self._ensure_output_dir())}
-        images_payload = [image]
+        # Nur hier wird PIL gebraucht; fromarray ist eine Sicht auf das
+        # ndarray, keine weitere Pixel-Kopie.
+        images_payload = [
+            Image.fromarray(image) if isinstance(image, np.ndarray) else image
+            for image in images_payload
+        ]
         logger.debug(
-            "OCR infer Aufruf: images_typ=%s, image_typ=%s, images_ist_liste=%s",
+            "OCR infer Aufruf: images_typ=%s, anzahl=%d",
             type(images_payload).__name__,
-            type(image).__name__,
-            isinstance(images_payload, list),
+            len(images_payload),
         )
         try:
             return model.infer(images=images_payload, prompt=self._OCR_PROMPT, **output_kwargs)
@@ -2,10 +2,10 @@
 
 from __future__ import annotations
 
+import functools
 import importlib.util
 import queue
 import re
-import subprocess
 import sys
 from pathlib import Path
 from importlib import metadata
@@ -19,9 +19,10 @@ for path in (PROJECT_ROOT, SRC_ROOT):
         sys.path.insert(0, str(path))
 
 from src.core.config import Config
-from src.core.model_manager import ModelManager
-from src.core.pipeline import ProcessingPipeline
-from src.core.watcher import FileWatcher
+
+
+# Einmal kompiliert statt pro Zeile; '[' deckt Extras wie pkg[extra] mit ab.
+_VERSION_SEP = re.compile(r"[<>=!~ \[]")
 
 
 def _extract_requirement_name(line: str) -> str | None:
@@ -32,52 +33,68 @@ def _extract_requirement_name(line: str) -> str | None:
     cleaned = cleaned.split(";", 1)[0].strip()
     if not cleaned:
         return None
-    name = re.split(r"[<>=!~ ]", cleaned, maxsplit=1)[0].strip()
-    if "[" in name:
-        name = name.split("[", 1)[0].strip()
+    match = _VERSION_SEP.search(cleaned)
+    name = cleaned[: match.start()].strip() if match else cleaned
     return name or None
 
 
+# PEP-503-Normalisierung, damit die Namen mit der pip-Sicht uebereinstimmen.
+_CANONICAL = re.compile(r"[-_.]+")
+
+
+def _canonical_name(name: str) -> str:
+    """Normalisiert einen Paketnamen nach PEP 503."""
+    return _CANONICAL.sub("-", name).lower()
+
+
+@functools.lru_cache(maxsize=1)
+def _installed_distributions() -> frozenset[str]:
+    """Scannt sys.path genau einmal nach allen installierten Distributionen.
+
+    metadata.version(name) laeuft pro Paket erneut ueber alle
+    sys.path-Eintraege; ein einzelner distributions()-Durchlauf liefert
+    dieselbe Information mit einem einzigen Verzeichnis-Scan.
+    """
+    installed = set()
+    for dist in metadata.distributions():
+        dist_name = dist.metadata["Name"] if dist.metadata else None
+        if dist_name:
+            installed.add(_canonical_name(dist_name))
+    return frozenset(installed)
+
+
 def _find_missing_requirements(requirements_path: Path) -> list[str]:
     """Sammelt fehlende Pakete aus der requirements-Datei."""
     missing: list[str] = []
     if not requirements_path.exists():
         return missing
-    for line in requirements_path.read_text(encoding="utf-8").splitlines():
-        name = _extract_requirement_name(line)
-        if not name:
-            continue
-        try:
-            metadata.version(name)
-        except metadata.PackageNotFoundError:
-            missing.append(name)
+    with requirements_path.open("r", encoding="utf-8") as requirements_file:
+        for line in requirements_file:
+            name = _extract_requirement_name(line)
+            if not name:
+                continue
+            # Bereits importierte Module brauchen keinen Metadaten-Scan.
+            if name in sys.modules:
+                continue
+            if _canonical_name(name) not in _installed_distributions():
+                missing.append(name)
     return missing
 
 
-def _install_requirements(requirements_path: Path, missing: list[str]) -> None:
-    """Installiert fehlende Abhaengigkeiten via pip."""
-    missing_list = ", ".join(missing)
-    print(f"Fehlende Abhaengigkeiten gefunden ({missing_list}). Installation wird gestartet...")
-    try:
-        subprocess.run(
-            [sys.executable, "-m", "pip", "install", "-r", str(requirements_path)],
-            check=True,
-        )
-    except subprocess.CalledProcessError as exc:
-        print(
-            "Installation der Abhaengigkeiten ist fehlgeschlagen. Bitte pruefe die Ausgabe "
-            "und fuehre 'pip install -r requirements.txt' manuell aus."
-        )
-        raise SystemExit(1) from exc
-
-
 def main() -> None:
     """Startet die GUI samt Watcher und Processing-Pipeline."""
-    # Prueft beim Start alle Abhaengigkeiten und installiert fehlende Pakete automatisch nach.
+    # Nur pruefen und melden: der pip-Aufruf selbst kostet Sekunden und
+    # gehoert nicht in den Startpfad; installiert wird ueber start.bat
+    # bzw. scripts/bootstrap.py.
     requirements_path = PROJECT_ROOT / "requirements.txt"
     missing = _find_missing_requirements(requirements_path)
     if missing:
-        _install_requirements(requirements_path, missing)
+        missing_list = ", ".join(missing)
+        print(
+            f"Fehlende Abhaengigkeiten: {missing_list}. Bitte 'python scripts/bootstrap.py' "
+            "oder 'pip install -r requirements.txt' ausfuehren (Windows: start.bat)."
+        )
+        sys.exit(1)
 
     # Prueft, ob PyQt6 installiert ist, damit die Anwendung eine klare Meldung ausgeben kann.
     if importlib.util.find_spec("PyQt6") is None:
@@ -87,10 +104,10 @@ def main() -> None:
         )
         sys.exit(1)
 
+    from PyQt6.QtCore import QTimer
     from PyQt6.QtWidgets import QApplication
     # GUI-Imports erst nach dem PyQt6-Check, damit fehlende Abhaengigkeiten sauber abgefangen werden.
     from src.gui.main_window import MainWindow, apply_dark_theme
-    from src.gui.workers import PipelineWorker
     config_path = Path(__file__).resolve().parents[1] / "config" / "settings.yaml"
     settings = Config(config_path)
     settings.set_runtime_value("queue", queue.Queue())
@@ -98,32 +115,50 @@ def main() -> None:
     app = QApplication(sys.argv)
     apply_dark_theme(app)
 
-    model_manager = ModelManager.instance()
-    _ = model_manager.get_device()
-
     window = MainWindow(settings)
-    pipeline = ProcessingPipeline(settings, model_manager)
-    worker = PipelineWorker(pipeline)
-    watcher = FileWatcher(settings.get("paths", {}).get("input", "./input"), settings.get("queue"))
-
-    window.attach_worker(worker)
 
-    watcher_started = {"value": False}
+    # Worker und Watcher entstehen erst, nachdem das Fenster steht: der
+    # Import von torch/transformers ueber die Pipeline kostet Sekunden und
+    # soll das erste Zeichnen des Fensters nicht blockieren.
+    backend: dict[str, object] = {}
+
+    def init_backend() -> None:
+        # Laedt die schweren Module genau einmal und haengt Worker/Watcher an.
+        if backend:
+            return
+        from src.core.model_manager import ModelManager
+        from src.core.pipeline import ProcessingPipeline
+        from src.core.watcher import FileWatcher
+        from src.gui.workers import PipelineWorker
+
+        model_manager = ModelManager.instance()
+        _ = model_manager.get_device()
+        pipeline = ProcessingPipeline(settings, model_manager)
+        worker = PipelineWorker(pipeline)
+        window.attach_worker(worker)
+        backend["worker"] = worker
+        backend["watcher"] = FileWatcher(settings.snapshot().input_dir, settings.get("queue"))
+        backend["watcher_started"] = False
 
     def start_processing() -> None:
         # Startet Watcher und Pipeline-Thread.
-        if not watcher_started["value"]:
-            watcher.start()
-            watcher_started["value"] = True
+        init_backend()
+        if not backend["watcher_started"]:
+            backend["watcher"].start()
+            backend["watcher_started"] = True
+        worker = backend["worker"]
         if not worker.isRunning():
             worker.start()
         window.append_log("Watchdog gestartet und Pipeline laeuft.")
 
     def stop_processing() -> None:
-        # Stoppt Watcher und Pipeline-Thread.
-        if watcher_started["value"]:
-            watcher.stop()
-            watcher_started["value"] = False
+        # Stoppt Watcher und Pipeline-Thread (falls das Backend schon existiert).
+        if not backend:
+            return
+        if backend["watcher_started"]:
+            backend["watcher"].stop()
+            backend["watcher_started"] = False
+        worker = backend["worker"]
         if worker.isRunning():
             worker.stop()
             worker.wait(2000)
@@ -138,6 +173,9 @@ def main() -> None:
 
     app.aboutToQuit.connect(shutdown)
     window.show()
+    # Nach dem ersten Event-Loop-Durchlauf vorladen, damit ein spaeterer
+    # Klick auf Start nicht erst den Import-Stau abwarten muss.
+    QTimer.singleShot(0, init_backend)
     sys.exit(app.exec())
 
 
@@ -2,28 +2,156 @@
 
 from __future__ import annotations
 
+import queue
+import threading
 from typing import Iterator
 
 import fitz
-from PIL import Image
+import numpy as np
 
+_SENTINEL = object()
 
-def pdf_to_images(pdf_path: str) -> Iterator[Image.Image]:
-    """Konvertiert ein PDF in einen Generator von PIL-Images mit hoher Aufloesung."""
-    matrix = fitz.Matrix(3, 3)
+
+class _PixmapArray(np.ndarray):
+    """uint8-Sicht auf den Pixmap-Puffer, die die Pixmap selbst festhaelt.
+
+    samples_mv zeigt direkt in den C-Puffer der Pixmap; wird die Pixmap
+    freigegeben, zeigt jede abgeleitete Sicht ins Leere. Die Referenz am
+    Array bindet die Lebensdauer der Pixmap an die des Arrays (und aller
+    Slices davon, die ueber .base daran haengen).
+    """
+
+    _pixmap = None
+
+
+def _prefetch(iterator: Iterator[np.ndarray], maxsize: int = 1) -> Iterator[np.ndarray]:
+    """Laesst einen Hintergrund-Thread dem Konsumenten vorauslaufen.
+
+    get_pixmap gibt in C den GIL frei, daher ueberlappt das Rastern der
+    naechsten Seite echt mit der OCR der aktuellen. Die kleine Queue
+    begrenzt den Vorlauf, damit nicht alle Seiten gleichzeitig im RAM liegen.
+
+    Schliesst der Konsument den Generator vorzeitig (z. B. via del nach
+    einem OCR-Fehler), darf der Worker nicht fuer immer in put() auf der
+    vollen Queue haengen: das Abbruch-Event weckt ihn auf, und er
+    schliesst den Render-Generator, damit dessen finally das Dokument
+    sofort freigibt (sonst blockiert das offene Handle unter Windows
+    spaetere Moves der Eingabedatei).
+    """
+    results: "queue.Queue[object]" = queue.Queue(maxsize=maxsize)
+    abandoned = threading.Event()
+
+    def _offer(item: object) -> bool:
+        """put mit Timeout-Schleife; False, sobald der Konsument weg ist."""
+        while not abandoned.is_set():
+            try:
+                results.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _worker() -> None:
+        try:
+            try:
+                for item in iterator:
+                    if not _offer(item):
+                        return
+            except BaseException as exc:  # noqa: BLE001 - Fehler zum Konsumenten durchreichen.
+                _offer(exc)
+                return
+            _offer(_SENTINEL)
+        finally:
+            # Render-Generator deterministisch schliessen statt auf den GC
+            # zu warten; nach normaler Erschoepfung ist close() ein No-Op.
+            close = getattr(iterator, "close", None)
+            if close is not None:
+                close()
+
+    thread = threading.Thread(target=_worker, name="pdf-prefetch", daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = results.get()
+            if item is _SENTINEL:
+                break
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+    finally:
+        # Laeuft auch bei GeneratorExit: Worker aufwecken und auslaufen lassen.
+        abandoned.set()
+
+
+# Zoom-Grenzen: unter 1.5 leidet die Tabellen-Lesbarkeit, ueber 3.0
+# (216 DPI) verwirft der Processor die zusaetzlichen Pixel nur wieder.
+_MIN_ZOOM = 1.5
+_MAX_ZOOM = 3.0
+
+
+def _zoom_for_page(page: "fitz.Page", target_long_px: int | None) -> float:
+    """Bestimmt den Zoom so, dass die lange Kante das Modell-Eingabemass trifft."""
+    if not target_long_px:
+        return _MAX_ZOOM
+    long_pt = max(page.rect.width, page.rect.height)
+    if long_pt <= 0:
+        return _MAX_ZOOM
+    return max(_MIN_ZOOM, min(_MAX_ZOOM, target_long_px / long_pt))
+
+
+def _render_pages(pdf_path: str, target_long_px: int | None = None) -> Iterator[np.ndarray]:
+    """Rendert die PDF-Seiten sequenziell (MuPDF ist nicht threadsicher)."""
     document = fitz.open(pdf_path)
     try:
         for page_index in range(document.page_count):
             page = document.load_page(page_index)
-            pixmap = page.get_pixmap(matrix=matrix)
+            zoom = _zoom_for_page(page, target_long_px)
+            # alpha=False/csRGB: der Alpha-Kanal wuerde vom OCR-Processor
+            # ohnehin verworfen, also gar nicht erst 33% mehr Bytes rastern.
+            pixmap = page.get_pixmap(
+                matrix=fitz.Matrix(zoom, zoom), alpha=False, colorspace=fitz.csRGB
+            )
             try:
-                mode = "RGB" if pixmap.alpha == 0 else "RGBA"
-                image = Image.frombytes(mode, (pixmap.width, pixmap.height), pixmap.samples)
+                samples_mv = getattr(pixmap, "samples_mv", None)
+                if samples_mv is not None:
+                    # samples_mv ist eine Sicht auf den C-Puffer; .samples
+                    # wuerde denselben Inhalt (~25 MB pro Seite bei Zoom 3)
+                    # noch einmal als bytes kopieren. Der HF-Processor nimmt
+                    # ndarrays direkt, PIL entsteht nur lazy im infer-Fallback.
+                    array = (
+                        np.frombuffer(samples_mv, dtype=np.uint8)
+                        .reshape(pixmap.height, pixmap.width, pixmap.n)
+                        .view(_PixmapArray)
+                    )
+                    array._pixmap = pixmap
+                else:
+                    # Aeltere PyMuPDF-Versionen ohne samples_mv: die bytes-
+                    # Kopie haelt die Daten selbst am Leben.
+                    array = np.frombuffer(pixmap.samples, dtype=np.uint8).reshape(
+                        pixmap.height, pixmap.width, pixmap.n
+                    )
             finally:
-                # Pixmap und Page sofort freigeben, um Speicher zu sparen.
+                # Lokale Namen sofort loesen; im samples_mv-Pfad haelt das
+                # Array die Pixmap weiter, im bytes-Pfad wird sie hier frei.
                 del pixmap
                 del page
-            yield image
+            yield array
     finally:
         # Dokument schliessen, sobald der Generator aufgebraucht ist.
         document.close()
+        try:
+            # MuPDF-Store leeren: gecachte Seiten- und Font-Objekte sollen
+            # nicht die gesamte OCR-Dauer ueber resident bleiben.
+            fitz.TOOLS.store_shrink(100)
+        except (AttributeError, RuntimeError):
+            # Aeltere PyMuPDF-Versionen ohne TOOLS-Schnittstelle.
+            pass
+
+
+def pdf_to_images(pdf_path: str, target_long_px: int | None = None) -> Iterator[np.ndarray]:
+    """Konvertiert ein PDF in einen Generator von HxWxC-uint8-Arrays.
+
+    target_long_px ist die erwartete lange Bildkante des Konsumenten
+    (z. B. des OCR-Processors); ohne Angabe wird mit Zoom 3 gerendert.
+    """
+    return _prefetch(_render_pages(pdf_path, target_long_px), maxsize=1)